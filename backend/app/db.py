@@ -10,7 +10,19 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_async_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=25,
+    max_overflow=25,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    connect_args={
+        "server_settings": {"jit": "off"},
+        "statement_cache_size": 1024,
+        "prepared_statement_cache_size": 256,
+    },
+)
 
 AsyncSessionLocal = async_sessionmaker(
     bind=engine,
@@ -20,3 +32,7 @@ AsyncSessionLocal = async_sessionmaker(
 
 Base = declarative_base()
 
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,12 +1,16 @@
 # Entry point (Socket.IO + FastAPI app)
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 import socketio
 from sockets.interview_socket import sio
 from utils.redis_utils import close_redis
+from utils.user_auth import close_email_queue
+from utils.logger import LOG_LEVEL
+from services.stt_service import close_http_session
 from socketio import ASGIApp 
 import sockets.interview_socket
 from routers.interview_router import router as interview_router
@@ -17,9 +21,11 @@ from routers.interviewer_router import router as interviewer_router
 from routers.user_router import router as user_router
 from routers.feedback_router import router as feedback_router
 from routers.media_router import router as media_router
-from middleware.auth_middleware import AuthMiddleware
+from middleware.auth_middleware import AuthMiddleware, ErrorMiddleware
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+import orjson
+import os
 import uvicorn
 
 load_dotenv()
@@ -27,33 +33,56 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     yield
+    await close_email_queue()
+    await close_http_session()
     await close_redis()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+# Added first so it sits innermost, inside CORS
+app.add_middleware(ErrorMiddleware)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 app.add_middleware(AuthMiddleware)
 
 sio_app = socketio.ASGIApp(sio)
 app.mount("/socket.io", sio_app)
 
-app.include_router(interview_router)
-app.include_router(question_router)
-app.include_router(response_router)
-app.include_router(session_router)
-app.include_router(interviewer_router)
-app.include_router(user_router)
-app.include_router(feedback_router)
-app.include_router(media_router)
+ROUTERS = [
+    interview_router,
+    question_router,
+    response_router,
+    session_router,
+    interviewer_router,
+    user_router,
+    feedback_router,
+    media_router,
+]
+for router in ROUTERS:
+    app.include_router(router)
+
+
+_ROOT_BYTES = orjson.dumps({"message": "AI Interview Tool API", "websocket": "/socket.io"})
+_HEALTH_BYTES = orjson.dumps({"ok": True, "message": "Interview API is healthy"})
 
 
 @app.get("/")
 async def root():
-    return {"message": "AI Interview Tool API", "websocket": "/socket.io"}
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 @app.get("/api/interview/health")
 async def health_check():
     """Health check endpoint"""
-    return {"ok": True, "message": "Interview API is healthy"}
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        # Each worker opens its own DB pool (up to 50 connections), so more than
+        # one has to be asked for explicitly
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        log_level=LOG_LEVEL.lower(),
+    )
\ No newline at end of file
@@ -1,12 +1,15 @@
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+import hmac
+import orjson
 import os
-from functools import wraps
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 API_KEY = os.getenv("API_KEY")
+_API_KEY_BYTES = (API_KEY or "").encode("latin-1")
 
-PUBLIC_PATHS = {
+PUBLIC_PATHS = frozenset({
     "/", 
     "/docs", 
     "/redoc", 
@@ -23,37 +26,88 @@ PUBLIC_PATHS = {
     "/api/feedback/candidate-feedback",
     "/api/interview/get-response",
     "/api/media/upload-candidate-video",
-}
+})
+
+def _json_error(status: int, body: bytes) -> tuple:
+    return (
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        },
+        {"type": "http.response.body", "body": body},
+    )
+
+
+_MISSING_KEY = _json_error(401, b'{"detail":"API key required"}')
+_INVALID_KEY = _json_error(403, b'{"detail":"Invalid API key"}')
+
+
+class AuthMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        path = request.url.path
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in PUBLIC_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
 
-        if request.method == "OPTIONS":
-            return await call_next(request)
-        if path in PUBLIC_PATHS:
-            return await call_next(request)
+        api_key = x_api_key = None
+        for name, value in scope["headers"]:
+            if name == b"api_key" and api_key is None:
+                api_key = value
+            elif name == b"x-api-key" and x_api_key is None:
+                x_api_key = value
+        client_key = api_key or x_api_key
 
-        client_key = (
-            request.headers.get("API_KEY")
-            or request.headers.get("x-api-key")
-        )
         if not client_key:
-            return JSONResponse(status_code=401, content={"detail": "API key required"})
-        if client_key != API_KEY:
-            return JSONResponse(status_code=403, content={"detail": "Invalid API key"})
+            rejection = _MISSING_KEY
+        elif not hmac.compare_digest(client_key, _API_KEY_BYTES):
+            rejection = _INVALID_KEY
+        else:
+            await self.app(scope, receive, send)
+            return
+
+        start, body = rejection
+        await send(start)
+        await send(body)
+
+
+class ErrorMiddleware:
+    """Turns unhandled exceptions from any route into a JSON 500.
+
+    Installed inside CORSMiddleware so error responses still carry CORS headers;
+    HTTPExceptions never reach it because FastAPI renders them first.
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return await call_next(request)
+        response_started = False
 
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
 
-def safe_route(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
         try:
-            return await func(*args, **kwargs)
-        except HTTPException:
-            raise  
+            await self.app(scope, receive, tracking_send)
         except Exception as e:
-            print(f"[ERROR] {func.__name__} failed: {e}")
-            raise HTTPException(status_code=500, detail=str(e))
-    return wrapper
\ No newline at end of file
+            if response_started:
+                raise
+            logger.exception("%s %s failed", scope["method"], scope["path"])
+            start, body = _json_error(500, orjson.dumps({"detail": str(e)}))
+            await send(start)
+            await send(body)
\ No newline at end of file
@@ -3,7 +3,7 @@
 import uuid
 import enum
 from datetime import datetime
-from sqlalchemy import (create_engine, Column,String,Integer,FLOAT,Text,Boolean,DateTime,ForeignKey,Enum,JSON,ARRAY,TIMESTAMP,func)
+from sqlalchemy import (create_engine, Column,String,Integer,FLOAT,Text,Boolean,DateTime,ForeignKey,Enum,JSON,ARRAY,TIMESTAMP,Computed,Index,func,text)
 from sqlalchemy.dialects.postgresql import JSONB,UUID
 from sqlalchemy.orm import declarative_base,relationship
 
@@ -72,6 +72,7 @@ class Interview(Base):
     is_open = Column(Boolean, default=True)
     url = Column(Text)
     readable_slug = Column(Text)
+    candidate_link = Column(Text)
     questions = Column(JSONB)
     insights = Column(ARRAY(Text))
     respondents = Column(ARRAY(Text))
@@ -110,9 +111,19 @@ class Response(Base):
     overall_analysis = Column(JSONB, default={})
     status = Column(String, default="no_status")
     status_source = Column(String, default="manual")
+    candidate_video_url = Column(Text)
+    # Extracted from overall_analysis by Postgres so listings can sort and group without parsing JSON
+    overall_score = Column(FLOAT, Computed("COALESCE((overall_analysis->>'overall_score')::double precision, 0)", persisted=True))
+    communication_score = Column(FLOAT, Computed("COALESCE((overall_analysis->>'communication_score')::double precision, 0)", persisted=True))
+    sentiment = Column(Text, Computed("COALESCE(lower(overall_analysis->>'sentiment'), 'neutral')", persisted=True))
 
     interview = relationship("Interview", back_populates="responses")
 
+    __table_args__ = (
+        Index("ix_response_interview_completed", "interview_id", postgresql_where=text("is_completed")),
+        Index("ix_response_overall_score", "interview_id", "overall_score", "id"),
+    )
+
 class Feedback(Base):
     __tablename__ = "feedback"
 
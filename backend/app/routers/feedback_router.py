@@ -1,8 +1,8 @@
 # CRUD endpoints for feedbacks
 
-from fastapi import APIRouter, HTTPException
-from db import AsyncSessionLocal
-from sqlalchemy import select
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_db
 from models import Feedback, Interview
 from schemas.feedback_schema import CreateFeedbackRequest
 from utils.interview_utils import commit_and_refresh
@@ -12,19 +12,17 @@ router = APIRouter(prefix="/api/feedback", tags=["feedback"])
 
 
 @router.post("/candidate-feedback")
-async def create_feedback(payload: CreateFeedbackRequest):
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(select(Interview).where(Interview.id == payload.interview_id))
-        interview = result.scalar_one_or_none()
-        if not interview:
-            raise HTTPException(status_code=404, detail="Interview not found")
+async def create_feedback(payload: CreateFeedbackRequest, db: AsyncSession = Depends(get_db)):
+    interview = await db.get(Interview, payload.interview_id)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
 
-        fb = Feedback(
-            interview_id=payload.interview_id,
-            email=payload.email,
-            feedback=payload.feedback,
-            satisfaction=payload.satisfaction,
-        )
-        db.add(fb)
-        await commit_and_refresh(db, fb)
-        return {"status": "ok", "feedback_id": str(fb.id), "message": "Feedback submitted successfully"}
+    fb = Feedback(
+        interview_id=payload.interview_id,
+        email=payload.email,
+        feedback=payload.feedback,
+        satisfaction=payload.satisfaction,
+    )
+    db.add(fb)
+    await commit_and_refresh(db, fb)
+    return {"status": "ok", "feedback_id": str(fb.id), "message": "Feedback submitted successfully"}
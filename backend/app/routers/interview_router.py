@@ -1,11 +1,20 @@
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request, Depends
+from fastapi import Response as HTTPResponse
 from typing import Optional
 from pathlib import Path
+import asyncio
+import os
+import re
+import shutil
+import tempfile
 import uuid
+import orjson
 from sqlalchemy import select, func, desc
+from sqlalchemy.orm import load_only
 from sqlalchemy.orm.attributes import flag_modified
-from db import AsyncSessionLocal
-from models import Interview, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_db
+from models import Interview, Interviewer, Response
 from schemas.interview_schema import (
     DeleteInterviewRequest,
     ToggleInterviewStatusRequest,
@@ -14,37 +23,62 @@ from services.summarization_service import summarization_service
 from services.llm_service import llm_service
 from utils.interview_utils import (
     get_interview_or_404,
-    extract_text_from_file,
+    invalidate_interview_cache,
+    extract_text_from_path,
     get_questions_list,
     parse_manual_questions,
-    commit_and_refresh
+    commit_and_refresh,
+    REPORTABLE_RESPONSE_FILTER,
 )
-from middleware.auth_middleware import safe_route
+from utils.redis_utils import get_cached, set_cached, delete_cached
 
 router = APIRouter(prefix="/api/interview", tags=["interview"])
 
+_SLUG_SEPARATOR_RE = re.compile(r"[\s_]+")
+_SLUG_INVALID_RE = re.compile(r"[^a-z0-9-]+")
+
+LIST_INTERVIEWS_CACHE_KEY = "list-interviews"
+LIST_INTERVIEWS_CACHE_TTL = 15
+
+async def _invalidate_list_cache():
+    try:
+        await delete_cached(LIST_INTERVIEWS_CACHE_KEY)
+    except Exception as e:
+        print(f"[WARN] Failed to invalidate list-interviews cache: {e}")
+
+# Columns read by serialize_interview; list endpoints skip everything else.
+INTERVIEW_LIST_COLUMNS = (
+    Interview.id,
+    Interview.name,
+    Interview.objective,
+    Interview.question_mode,
+    Interview.question_count,
+    Interview.context,
+    Interview.llm_generated_questions,
+    Interview.manual_questions,
+    Interview.candidate_link,
+    Interview.description,
+    Interview.is_open,
+    Interview.interviewer_id,
+    Interview.time_duration,
+    Interview.created_at,
+)
+
 def serialize_interview(interview, responses_count: Optional[int] = None, include_created_at: bool = False):
     questions = get_questions_list(interview)
-    candidate_link = None
-    if interview.readable_slug:
-        candidate_link = f"/candidate/interview/{interview.readable_slug}"
-    elif interview.url:
-        candidate_link = interview.url
-    else:
-        candidate_link = f"/candidate/interview/{interview.id}"
     
     result = {
-        "id": str(interview.id),
+        "id": interview.id,
         "name": interview.name,
         "objective": interview.objective,
         "mode": interview.question_mode,
         "question_count": interview.question_count,
         "context": interview.context,
         "questions": questions if questions else None,
-        "candidate_link": candidate_link,
+        "candidate_link": interview.candidate_link,
         "description": interview.description,
         "is_open": interview.is_open if hasattr(interview, 'is_open') else True,
-        "interviewer_id": str(interview.interviewer_id) if interview.interviewer_id else None,
+        "interviewer_id": interview.interviewer_id,
         "time_duration": interview.time_duration,
     }
     
@@ -52,12 +86,11 @@ def serialize_interview(interview, responses_count: Optional[int] = None, includ
         result["responses_count"] = responses_count
     
     if include_created_at:
-        result["created_at"] = interview.created_at.isoformat() if interview.created_at else None
+        result["created_at"] = interview.created_at
     
     return result
 
 @router.post("/create-interview")
-@safe_route
 async def create_interview(
     name: str = Form(...),
     objective: str = Form(...),
@@ -69,103 +102,113 @@ async def create_interview(
     interviewer_id: Optional[str] = Form(None),
     duration_minutes: Optional[int] = Form(None),
     jd_file: UploadFile = File(None),
+    db: AsyncSession = Depends(get_db),
 ):
-    async with AsyncSessionLocal() as db:
-        if difficulty_level not in ["low", "medium", "high"]:
-            difficulty_level = "medium"
-        
-        interviewer_id_uuid = None
-        if interviewer_id:
-            try:
-                from models import Interviewer
-                interviewer_id_uuid = uuid.UUID(interviewer_id)
-                result = await db.execute(
-                    select(Interviewer).where(Interviewer.id == interviewer_id_uuid)
-                )
-                interviewer = result.scalar_one_or_none()
-                if not interviewer:
-                    raise HTTPException(status_code=404, detail="Interviewer not found")
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid interviewer_id format")
-        
-        time_duration_str = None
-        if duration_minutes and duration_minutes > 0:
-            time_duration_str = str(duration_minutes)
-            
-        url_id = str(uuid.uuid4())
-        url = f"/candidate/interview/{url_id}"
-        
-        readable_slug = None
-        if name:
-            readable_slug = name.lower().replace(' ', '-').replace('_', '-')
-            readable_slug = ''.join(c for c in readable_slug if c.isalnum() or c == '-')[:50]
-            readable_slug = readable_slug.strip('-')
-        
-        interview = Interview(
-            name=name,
-            objective=objective,
-            question_mode=mode,
-            question_count=question_count,
-            auto_question_generate=auto_question_generate,
-            manual_questions=parse_manual_questions(manual_questions),
-            interviewer_id=interviewer_id_uuid,
-            time_duration=time_duration_str,
-            respondents=None,
-            url=url,
-            readable_slug=readable_slug
-        )
-        db.add(interview)
-        await commit_and_refresh(db, interview)
-        
-        if not interview.context:
-            interview.context = {}
-        interview.context["difficulty_level"] = difficulty_level
-        if "context_summary" not in interview.context:
-            interview.context["context_summary"] = f"Interview objective: {objective}"
-        flag_modified(interview, 'context')  
+    if difficulty_level not in ["low", "medium", "high"]:
+        difficulty_level = "medium"
+    
+    interviewer_id_uuid = None
+    if interviewer_id:
+        try:
+            interviewer_id_uuid = uuid.UUID(interviewer_id)
+            interviewer = await db.get(Interviewer, interviewer_id_uuid)
+            if not interviewer:
+                raise HTTPException(status_code=404, detail="Interviewer not found")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid interviewer_id format")
+    
+    time_duration_str = None
+    if duration_minutes and duration_minutes > 0:
+        time_duration_str = str(duration_minutes)
         
-        if jd_file:
-            allowed_extensions = ['.pdf', '.docx', '.doc', '.txt']
-            file_extension = Path(jd_file.filename).suffix.lower()
-            if file_extension not in allowed_extensions:
-                raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}")
-            
-            jd_text = extract_text_from_file(await jd_file.read(), jd_file.filename)
-            jd_summary = await summarization_service.summarize_jd(jd_text)
-            if isinstance(jd_summary, dict):
-                jd_summary["difficulty_level"] = difficulty_level
-                jd_summary["context_summary"] = summarization_service.get_context_for_llm(jd_summary)
-            interview.context = jd_summary
-            flag_modified(interview, 'context')  
+    url_id = str(uuid.uuid4())
+    url = f"/candidate/interview/{url_id}"
+    
+    readable_slug = None
+    if name:
+        readable_slug = _SLUG_INVALID_RE.sub("", _SLUG_SEPARATOR_RE.sub("-", name.lower()))[:50].strip("-")
+    candidate_link = f"/candidate/interview/{readable_slug}" if readable_slug else url
+    
+    context = {
+        "difficulty_level": difficulty_level,
+        "context_summary": f"Interview objective: {objective}",
+    }
+    
+    if jd_file:
+        allowed_extensions = ['.pdf', '.docx', '.doc', '.txt']
+        file_extension = Path(jd_file.filename).suffix.lower()
+        if file_extension not in allowed_extensions:
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Allowed: {', '.join(allowed_extensions)}")
         
-        await db.commit()
-        return serialize_interview(interview)
+        loop = asyncio.get_running_loop()
+        tmp = tempfile.NamedTemporaryFile(suffix=file_extension, delete=False)
+        try:
+            with tmp:
+                await loop.run_in_executor(None, shutil.copyfileobj, jd_file.file, tmp)
+            jd_text = await loop.run_in_executor(None, extract_text_from_path, tmp.name)
+        finally:
+            os.unlink(tmp.name)
+        jd_summary = await summarization_service.summarize_jd(jd_text)
+        if isinstance(jd_summary, dict):
+            jd_summary["difficulty_level"] = difficulty_level
+            jd_summary["context_summary"] = summarization_service.get_context_for_llm(jd_summary)
+        context = jd_summary
+    
+    interview = Interview(
+        name=name,
+        objective=objective,
+        question_mode=mode,
+        question_count=question_count,
+        auto_question_generate=auto_question_generate,
+        manual_questions=parse_manual_questions(manual_questions),
+        interviewer_id=interviewer_id_uuid,
+        time_duration=time_duration_str,
+        respondents=None,
+        url=url,
+        readable_slug=readable_slug,
+        candidate_link=candidate_link,
+        context=context
+    )
+    db.add(interview)
+    await commit_and_refresh(db, interview)
+    await _invalidate_list_cache()
+    return serialize_interview(interview)
 
 @router.get("/list-interviews")
-@safe_route
-async def list_interviews():
-    async with AsyncSessionLocal() as db:
-        result = await db.execute(select(Interview).order_by(desc(Interview.created_at)))
-        interviews = result.scalars().all()
-        items = []
-        for it in interviews:
-            count_result = await db.execute(
-                select(Response)
-                .where(Response.interview_id == it.id)
-                .where(Response.is_completed == True)
-            )
-            completed_responses = count_result.scalars().all()
-            actual_response_count = sum(
-                1 for r in completed_responses
-                if (r.qa_history and len(r.qa_history) > 0) or getattr(r, 'overall_analysis', None) is not None
-            )
-            
-            items.append(serialize_interview(it, responses_count=actual_response_count, include_created_at=True))
-        return {"ok": True, "interviews": items}
+async def list_interviews(db: AsyncSession = Depends(get_db)):
+    try:
+        cached = await get_cached(LIST_INTERVIEWS_CACHE_KEY)
+    except Exception as e:
+        print(f"[WARN] list-interviews cache read failed: {e}")
+        cached = None
+    if cached:
+        return HTTPResponse(cached, media_type="application/json")
+
+    completed_counts = (
+        select(Response.interview_id, func.count().label("cnt"))
+        .where(REPORTABLE_RESPONSE_FILTER)
+        .group_by(Response.interview_id)
+        .subquery()
+    )
+    result = await db.execute(
+        select(Interview, func.coalesce(completed_counts.c.cnt, 0))
+        .options(load_only(*INTERVIEW_LIST_COLUMNS))
+        .outerjoin(completed_counts, completed_counts.c.interview_id == Interview.id)
+        .order_by(desc(Interview.created_at))
+    )
+    items = [
+        serialize_interview(it, responses_count=count, include_created_at=True)
+        for it, count in result.all()
+    ]
+    body = orjson.dumps({"ok": True, "interviews": items})
+    try:
+        await set_cached(LIST_INTERVIEWS_CACHE_KEY, body, LIST_INTERVIEWS_CACHE_TTL)
+    except Exception as e:
+        print(f"[WARN] list-interviews cache write failed: {e}")
+    return HTTPResponse(body, media_type="application/json")
 
 
 @router.post("/update-interview")
-@safe_route
 async def update_interview(
     interview_id: str = Form(...),
     mode: Optional[str] = Form(None),
@@ -175,106 +218,114 @@ async def update_interview(
     description: Optional[str] = Form(None),
     name: Optional[str] = Form(None),
     difficulty_level: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_db),
 ):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, interview_id)
+    interview = await get_interview_or_404(db, interview_id)
 
-        original_mode = interview.question_mode
-        original_qc = interview.question_count
+    original_mode = interview.question_mode
+    original_qc = interview.question_count
 
-        name = name or interview.name
-        objective = objective or interview.objective
-        description = description or interview.description
-        mode = mode or interview.question_mode
-        auto_question_generate = auto_question_generate or interview.auto_question_generate
+    name = name or interview.name
+    objective = objective or interview.objective
+    description = description or interview.description
+    mode = mode or interview.question_mode
+    auto_question_generate = auto_question_generate or interview.auto_question_generate
+    
+    if manual_questions is not None:
+        parsed_questions = parse_manual_questions(manual_questions)
         
-        if manual_questions is not None:
-            parsed_questions = parse_manual_questions(manual_questions)
-            
-            if interview.question_mode == "dynamic":
+        if interview.question_mode == "dynamic":
+            interview.manual_questions = None
+        elif interview.auto_question_generate:
+            if parsed_questions and len(parsed_questions) > 0:
+                formatted_questions = []
+                for q in parsed_questions:
+                    formatted_q = {
+                        "id": str(q.get("id")) if q.get("id") else None,
+                        "question": q.get("question", ""),
+                        "difficulty": q.get("depth_level", "medium")  
+                    }
+                    if formatted_q["id"]:
+                        formatted_questions.append(formatted_q)
+                    else:
+                        formatted_q["id"] = str(uuid.uuid4())
+                        formatted_questions.append(formatted_q)
+                
+                interview.llm_generated_questions = {"questions": formatted_questions}
+                flag_modified(interview, 'llm_generated_questions')
                 interview.manual_questions = None
-            elif interview.auto_question_generate:
-                if parsed_questions and len(parsed_questions) > 0:
-                    formatted_questions = []
-                    for q in parsed_questions:
-                        formatted_q = {
-                            "id": str(q.get("id")) if q.get("id") else None,
-                            "question": q.get("question", ""),
-                            "difficulty": q.get("depth_level", "medium")  
-                        }
-                        if formatted_q["id"]:
-                            formatted_questions.append(formatted_q)
-                        else:
-                            formatted_q["id"] = str(uuid.uuid4())
-                            formatted_questions.append(formatted_q)
-                    
-                    interview.llm_generated_questions = {"questions": formatted_questions}
-                    flag_modified(interview, 'llm_generated_questions')
-                    interview.manual_questions = None
+        else:
+            if parsed_questions and len(parsed_questions) > 0:
+                interview.manual_questions = parsed_questions
             else:
-                if parsed_questions and len(parsed_questions) > 0:
-                    interview.manual_questions = parsed_questions
-                else:
-                    interview.manual_questions = None
-                if auto_question_generate is None:
-                    interview.auto_question_generate = False
-        
-        if difficulty_level is not None:
-            if difficulty_level not in ["low", "medium", "high"]:
-                difficulty_level = "medium"
-            if not interview.context:
-                interview.context = {}
-            interview.context["difficulty_level"] = difficulty_level
-            flag_modified(interview, 'context')  
+                interview.manual_questions = None
+            if auto_question_generate is None:
+                interview.auto_question_generate = False
+    
+    if difficulty_level is not None:
+        if difficulty_level not in ["low", "medium", "high"]:
+            difficulty_level = "medium"
+        if not interview.context:
+            interview.context = {}
+        interview.context["difficulty_level"] = difficulty_level
+        flag_modified(interview, 'context')  
 
-        if (
-            original_mode != interview.question_mode
-            or original_qc != interview.question_count
-        ):
-            interview.llm_generated_questions = None
+    if (
+        original_mode != interview.question_mode
+        or original_qc != interview.question_count
+    ):
+        interview.llm_generated_questions = None
 
-        await db.commit()
-        await db.refresh(interview)
-        return serialize_interview(interview)
+    await db.commit()
+    await db.refresh(interview)
+    await invalidate_interview_cache(interview.id)
+    await _invalidate_list_cache()
+    return serialize_interview(interview)
 
 @router.post("/delete-interview")
-@safe_route
 async def delete_interview(
     payload: DeleteInterviewRequest,
+    db: AsyncSession = Depends(get_db),
 ):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, payload.interview_id)
-        try:
-            await db.delete(interview)
-            await db.commit()
-            return {"ok": True, "message": "Interview deleted successfully"}
-        except Exception as e:
-            await db.rollback()
-            raise  
+    interview = await get_interview_or_404(db, payload.interview_id)
+    try:
+        await db.delete(interview)
+        await db.commit()
+        await invalidate_interview_cache(payload.interview_id)
+        await _invalidate_list_cache()
+        return {"ok": True, "message": "Interview deleted successfully"}
+    except Exception as e:
+        await db.rollback()
+        raise  
 
 @router.post("/toggle-interview-status")
-@safe_route
 async def toggle_interview_status(
     payload: ToggleInterviewStatusRequest,
+    db: AsyncSession = Depends(get_db),
 ):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, payload.interview_id)
-        interview.is_open = not interview.is_open
-        await db.commit()
-        await db.refresh(interview)
-        return {"ok": True, "is_open": interview.is_open}
+    interview = await get_interview_or_404(db, payload.interview_id)
+    interview.is_open = not interview.is_open
+    await db.commit()
+    await db.refresh(interview)
+    await invalidate_interview_cache(interview.id)
+    await _invalidate_list_cache()
+    return {"ok": True, "is_open": interview.is_open}
 
 @router.get("/list-interview-responses")
-@safe_route
-async def list_responses(interview_id: str = Query(...)):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, interview_id)
-        result = await db.execute(select(Response).where(Response.interview_id == interview_id))
-        rows = result.scalars().all()
-        payload = [{
-            "response_id": str(r.id),
-            "name": r.name,
-            "email": r.email,
-            "answered_questions": len(r.qa_history or [])
-        } for r in rows]
-        return {"ok": True, "responses": payload}
+async def list_responses(interview_id: str = Query(...), db: AsyncSession = Depends(get_db)):
+    interview = await get_interview_or_404(db, interview_id)
+    result = await db.execute(
+        select(
+            Response.id,
+            Response.name,
+            Response.email,
+            func.coalesce(func.jsonb_array_length(Response.qa_history), 0),
+        ).where(Response.interview_id == interview_id)
+    )
+    payload = [{
+        "response_id": str(response_id),
+        "name": name,
+        "email": email,
+        "answered_questions": answered
+    } for response_id, name, email, answered in result.all()]
+    return {"ok": True, "responses": payload}
@@ -7,7 +7,6 @@ from schemas.interview_schema import (
     UpdateInterviewerRequest,
     DeleteInterviewerRequest
 )
-from middleware.auth_middleware import safe_route
 import uuid
 
 router = APIRouter(prefix="/api/interviewer", tags=["interviewer"])
@@ -27,12 +26,11 @@ def serialize_interviewer(interviewer):
         "name": interviewer.name,
         "accent": interviewer.accent,
         "elevenlabs_voice_id": interviewer.elevenlabs_voice_id,
-        "created_at": interviewer.created_at.isoformat() if interviewer.created_at else None,
+        "created_at": interviewer.created_at,
         "is_active": interviewer.is_active
     }
 
 @router.post("/create-interviewer")
-@safe_route
 async def create_interviewer(
     name: str = Form(...),
     accent: Optional[str] = Form(None),
@@ -56,7 +54,6 @@ async def create_interviewer(
             raise 
 
 @router.get("/list-interviewers")
-@safe_route
 async def list_interviewers():
     async with AsyncSessionLocal() as db:
         result = await db.execute(
@@ -69,7 +66,6 @@ async def list_interviewers():
         }
 
 @router.get("/get-interviewer")
-@safe_route
 async def get_interviewer(
     interviewer_id: str = Query(...),
 ):
@@ -78,7 +74,6 @@ async def get_interviewer(
         return serialize_interviewer(interviewer)
 
 @router.post("/update-interviewer")
-@safe_route
 async def update_interviewer(
     payload: UpdateInterviewerRequest,
 ):
@@ -103,7 +98,6 @@ async def update_interviewer(
             raise  
 
 @router.post("/delete-interviewer")
-@safe_route
 async def delete_interviewer(
     payload: DeleteInterviewerRequest,
 ):
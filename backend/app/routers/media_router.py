@@ -1,8 +1,8 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-from typing import Dict
-from services.storage_service import storage_service
-from db import AsyncSessionLocal
-from utils.interview_utils import get_response_or_404
+from fastapi import APIRouter, Form, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_db
+from utils.interview_utils import store_candidate_video_or_404
 
 
 router = APIRouter(prefix="/api/media", tags=["media"])
@@ -13,48 +13,33 @@ router = APIRouter(prefix="/api/media", tags=["media"])
 # Video uploads are handled via chunks through Socket.IO
 # Keeping these for backward compatibility but they may need response_id
 
+# The legacy endpoints only ever reject, so their responses are built once.
+_REJECT_CANDIDATE_IMAGE = JSONResponse(
+    status_code=400,
+    content={"detail": "This endpoint requires response_id. Please use /api/interview/upload-candidate-image instead"},
+)
+_REJECT_SCREEN_RECORDING = JSONResponse(
+    status_code=400,
+    content={"detail": "Screen recordings are handled via chunks through Socket.IO. This endpoint is not used."},
+)
+
+
 @router.post("/upload-candidate-image")
-async def upload_candidate_image(file: UploadFile = File(...)) -> Dict[str, str]:
+async def upload_candidate_image():
     """Legacy endpoint - consider using /api/interview/upload-candidate-image instead"""
-    try:
-        data = await file.read()
-        # This endpoint needs response_id to work properly
-        # For now, return error suggesting the correct endpoint
-        raise HTTPException(
-            status_code=400, 
-            detail="This endpoint requires response_id. Please use /api/interview/upload-candidate-image instead"
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to save image") from e
+    return _REJECT_CANDIDATE_IMAGE
 
 
 @router.post("/upload-screen-recording")
-async def upload_screen_recording(file: UploadFile = File(...)) -> Dict[str, str]:
+async def upload_screen_recording():
     """Legacy endpoint - screen recordings are handled via chunks through Socket.IO"""
-    try:
-        # Screen recordings are sent as chunks via Socket.IO, not as single file uploads
-        raise HTTPException(
-            status_code=400,
-            detail="Screen recordings are handled via chunks through Socket.IO. This endpoint is not used."
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to save video") from e
+    # Screen recordings are sent as chunks via Socket.IO, not as single file uploads
+    return _REJECT_SCREEN_RECORDING
 
 
 @router.post("/upload-candidate-video")
-async def upload_candidate_video(response_id: str = Form(...)):
+async def upload_candidate_video(response_id: str = Form(...), db: AsyncSession = Depends(get_db)):
     """Merge video chunks and save the final video"""
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, response_id)
-        # Extension will be auto-detected from chunks
-        storage_url = await storage_service.save_candidate_video(response_id)
-
-        response.candidate_video_url = storage_url
-        await db.commit()
-        await db.refresh(response)
-        return {"ok": True, "message": "Uploaded successfully", "storage_path": storage_url}
+    storage_url = await store_candidate_video_or_404(db, response_id)
+    return {"ok": True, "message": "Uploaded successfully", "storage_path": storage_url}
 
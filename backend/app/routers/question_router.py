@@ -6,7 +6,6 @@ from models import Interviewer
 from schemas.interview_schema import GenerateQuestionsRequest
 from services.question_service import QuestionService
 from utils.interview_utils import get_interview_or_404, get_response_or_404, get_questions_list, question_text, synthesize_tts
-from middleware.auth_middleware import safe_route
 
 router = APIRouter(prefix="/api/interview", tags=["questions"])
 
@@ -44,7 +43,6 @@ async def _add_tts_to_result(result: dict, q_text: str, voice_id: Optional[str])
 
 
 @router.post("/generate-questions")
-@safe_route
 async def generate_questions(request: GenerateQuestionsRequest):
     async with AsyncSessionLocal() as db:
         interview = await get_interview_or_404(db, request.interview_id)
@@ -52,7 +50,7 @@ async def generate_questions(request: GenerateQuestionsRequest):
         target_count = request.question_count if request.question_count and request.question_count > 0 else interview.question_count
         
         if interview.question_mode == "dynamic" and interview.auto_question_generate:
-            generated_description = await QuestionService.handle_dynamic_mode_description(
+            generated_description = await QuestionService.bootstrap_dynamic_interview(
                 interview, db, context_for_llm
             )
             return {
@@ -81,7 +79,6 @@ async def generate_questions(request: GenerateQuestionsRequest):
 
 
 @router.get("/get-current-question")
-@safe_route
 async def get_current_question(response_id: str = Query(...)):
     async with AsyncSessionLocal() as db:
         response = await get_response_or_404(db, response_id)
@@ -1,24 +1,37 @@
-from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Depends, UploadFile, File, Form
+import asyncio
+import base64
+import json
+import uuid
 from datetime import datetime, timezone
-from sqlalchemy import select
+from typing import Optional
+from sqlalchemy import bindparam, select, update, func, or_, tuple_
 from sqlalchemy.orm.attributes import flag_modified
-from db import AsyncSessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import AsyncSessionLocal, get_db
 from models import Response
 from schemas.interview_schema import (
     SubmitAnswerRequest,
     UpdateResponseStatusRequest
 )
 from services.llm_service import llm_service
+from services.analysis_service import analysis_service
 from utils.interview_utils import (
     get_interview_or_404,
     get_response_or_404,
+    get_response_with_interview,
+    store_candidate_video_or_404,
+    REPORTABLE_RESPONSE_FILTER,
     get_questions_list,
     question_text,
     format_duration
 )
 from services.storage_service import storage_service
+from utils.file_utils import IMAGE_SNIFF_BYTES, sniff_image_extension
+from utils.logger import get_logger
 
 router = APIRouter(prefix="/api/interview", tags=["responses"])
+logger = get_logger(__name__)
 
 # def _auto_assign_status(score: int) -> str:
 #     if score >= 80:
@@ -41,16 +54,98 @@ router = APIRouter(prefix="/api/interview", tags=["responses"])
 #         response.status_source = "auto"
 #         await db.commit()
 
-async def _ensure_analysis(db, response, interview_id: str) -> dict:
-    overall_analysis = getattr(response, "overall_analysis", None)
-    if not overall_analysis and response.qa_history:
-        try:
-            overall_analysis = await llm_service.generate_final_analysis(str(interview_id), response.qa_history)
-            setattr(response, "overall_analysis", overall_analysis)
-            await db.commit()
-        except Exception:
-            pass
-    return overall_analysis or {}
+CANDIDATES_PAGE_SIZE = 25
+
+_response_table = Response.__table__
+# Skips rows whose analysis was stored meanwhile, e.g. by the background final analysis
+_FILL_MISSING_ANALYSIS = (
+    update(_response_table)
+    .where(_response_table.c.id == bindparam("response_id"))
+    .where(or_(_response_table.c.overall_analysis.is_(None), _response_table.c.overall_analysis == {}))
+    .values(overall_analysis=bindparam("analysis"))
+)
+# Backfilled analyses are LLM calls; cap how many one request runs at once
+BACKFILL_CONCURRENCY = 4
+
+def _encode_cursor(score: float, response_id) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, str(response_id)]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        score, response_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(score), uuid.UUID(response_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def _candidate_metrics(interview_id) -> dict:
+    # Runs on its own session so it can overlap the page query
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                Response.status,
+                Response.sentiment,
+                func.count(),
+                func.coalesce(func.sum(Response.duration), 0),
+            )
+            .where(Response.interview_id == interview_id)
+            .where(REPORTABLE_RESPONSE_FILTER)
+            .group_by(Response.status, Response.sentiment)
+        )
+        groups = result.all()
+    
+    total_responses = 0
+    total_duration = 0
+    sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
+    status_counts = {"selected": 0, "potential": 0, "not_selected": 0, "no_status": 0}
+    for status, sentiment, count, duration in groups:
+        status = status or "no_status"
+        total_responses += count
+        total_duration += duration
+        sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + count
+        status_counts[status] = status_counts.get(status, 0) + count
+    
+    average_seconds = int(total_duration / total_responses) if total_responses > 0 else 0
+    return {
+        "average_duration": format_duration(average_seconds),
+        "average_duration_seconds": average_seconds,
+        "completion_rate": "100%",
+        "sentiment": sentiment_counts,
+        "status": {
+            "total_responses": total_responses,
+            **status_counts
+        }
+    }
+
+async def _backfill_missing_analyses(db, interview_id: str):
+    # Scores must exist before the page can be ordered by them
+    result = await db.execute(
+        select(Response.id, Response.qa_history)
+        .where(Response.interview_id == interview_id)
+        .where(REPORTABLE_RESPONSE_FILTER)
+        .where(or_(Response.overall_analysis.is_(None), Response.overall_analysis == {}))
+        .where(func.jsonb_array_length(Response.qa_history) > 0)
+    )
+    rows = result.all()
+    if not rows:
+        return
+    semaphore = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+
+    async def generate(qa_history):
+        async with semaphore:
+            return await llm_service.generate_final_analysis(interview_id, qa_history)
+
+    analyses = await asyncio.gather(
+        *(generate(qa_history) for _, qa_history in rows),
+        return_exceptions=True,
+    )
+    generated = [
+        {"response_id": response_id, "analysis": analysis}
+        for (response_id, _), analysis in zip(rows, analyses)
+        if analysis and not isinstance(analysis, Exception)
+    ]
+    if generated:
+        await db.execute(_FILL_MISSING_ANALYSIS, generated)
+        await db.commit()
 
 def _get_candidate_summary(overall_analysis: dict) -> str:
     return (
@@ -107,256 +202,235 @@ def _build_question_summaries(interview, qa_history: list, overall_analysis: dic
     return question_summary
 
 def _build_transcript(qa_history: list, candidate_name: str) -> list:
-    transcript = []
-    for qa in qa_history:
-        if qa.get("question"):
-            transcript.append({"speaker": "AI interviewer", "text": qa.get("question")})
-        if qa.get("answer"):
-            transcript.append({"speaker": candidate_name or "Candidate", "text": qa.get("answer")})
-    return transcript
+    speaker = candidate_name or "Candidate"
+    return [
+        {"speaker": who, "text": text}
+        for qa in qa_history
+        for who, text in (("AI interviewer", qa.get("question")), (speaker, qa.get("answer")))
+        if text
+    ]
 
 @router.post("/submit-answer")
-async def submit_answer(request: SubmitAnswerRequest):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, request.response_id)
-        interview = await get_interview_or_404(db, str(response.interview_id))
+async def submit_answer(request: SubmitAnswerRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    response, interview = await get_response_with_interview(db, request.response_id)
 
-        qa_pair = {
-            "question": request.question,
-            "answer": request.transcript,
-            "analysis": {}
-        }
+    analysis = {}
+    if interview.context:
+        try:
+            analysis = await llm_service.analyze_response(
+                str(interview.id),
+                request.transcript,
+                {"question": request.question}
+            ) or {}
+        except Exception:
+            pass
 
-        updated_qa_history = list(response.qa_history or [])
-        updated_qa_history.append(qa_pair)
-        response.qa_history = updated_qa_history
-        flag_modified(response, 'qa_history')
-        response.current_question_index += 1
-
-        if interview.context:
-            try:
-                analysis = await llm_service.analyze_response(
-                    str(interview.id),
-                    request.transcript,
-                    {"question": request.question}
-                )
-                updated_qa_history[-1]["analysis"] = analysis or {}
-                response.qa_history = updated_qa_history
-                flag_modified(response, 'qa_history')
-            except Exception:
-                pass
-
-        total_questions = (
-            interview.question_count 
-            if interview.question_mode == "dynamic" and interview.question_count 
-            else len(get_questions_list(interview))
-        )
+    qa_pair = {
+        "question": request.question,
+        "answer": request.transcript,
+        "analysis": analysis
+    }
+
+    updated_qa_history = list(response.qa_history or [])
+    updated_qa_history.append(qa_pair)
+    response.qa_history = updated_qa_history
+    flag_modified(response, 'qa_history')
+    response.current_question_index += 1
+
+    total_questions = (
+        interview.question_count 
+        if interview.question_mode == "dynamic" and interview.question_count 
+        else len(get_questions_list(interview))
+    )
+    
+    is_complete = response.current_question_index >= total_questions and total_questions > 0
+    analysis_scheduled = False
+
+    if is_complete:
+        response.is_completed = True
+        if not response.end_time:
+            response.end_time = datetime.now(timezone.utc)
         
-        is_complete = response.current_question_index >= total_questions and total_questions > 0
-
-        if is_complete:
-            response.is_completed = True
-            if not response.end_time:
-                response.end_time = datetime.now(timezone.utc)
-            
-            if response.start_time and response.end_time:
-                response.duration = int((response.end_time - response.start_time).total_seconds())
-            
-            if interview.context:
-                try:
-                    final_analysis = await llm_service.generate_final_analysis(
-                        str(interview.id), response.qa_history
-                    )
-                    setattr(response, "overall_analysis", final_analysis)
-                    #await _assign_status_if_needed(db, response, final_analysis)
-                except Exception:
-                    pass
+        if response.start_time and response.end_time:
+            response.duration = int((response.end_time - response.start_time).total_seconds())
         
-        try:
-            await db.commit()
-            await db.refresh(response)
-        except Exception as e:
-            await db.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to save response: {str(e)}")
-
-        return {
-            "ok": True,
-            "complete": is_complete,
-            "question_number": response.current_question_index,
-            "total_questions": total_questions,
-            "questions_answered": len(response.qa_history) if response.qa_history else 0,
-            "analysis": qa_pair.get("analysis", {}),
-            "final_analysis": getattr(response, "overall_analysis", None) if is_complete else None
-        }
+        # The final analysis is generated after the response is sent
+        analysis_scheduled = bool(interview.context) and not response.overall_analysis
+    
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to save response: {str(e)}")
+
+    if analysis_scheduled:
+        background_tasks.add_task(analysis_service.run_final_analysis, str(response.id))
+
+    return {
+        "ok": True,
+        "complete": is_complete,
+        "question_number": response.current_question_index,
+        "total_questions": total_questions,
+        "questions_answered": len(updated_qa_history),
+        "analysis": analysis,
+        "final_analysis": (response.overall_analysis or None) if is_complete else None,
+        "analysis_status": "analyzing" if analysis_scheduled else None
+    }
 
 @router.get("/get-overall-analysis")
-async def get_overall_analysis(interview_id: str = Query(...)):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, interview_id)
-        
-        result = await db.execute(
-            select(Response)
-            .where(Response.interview_id == interview_id)
-            .where(Response.is_completed == True)
+async def get_overall_analysis(
+    interview_id: str = Query(...),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(CANDIDATES_PAGE_SIZE, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    interview = await get_interview_or_404(db, interview_id)
+    # The backfill and metrics cover the whole interview, so only the first page pays for them
+    if not cursor:
+        await _backfill_missing_analyses(db, str(interview.id))
+    
+    # Candidates are ordered by score, then id, so the pair is a stable keyset cursor
+    page_query = (
+        select(Response)
+        .where(Response.interview_id == interview.id)
+        .where(REPORTABLE_RESPONSE_FILTER)
+        .order_by(Response.overall_score.desc(), Response.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        page_query = page_query.where(tuple_(Response.overall_score, Response.id) < _decode_cursor(cursor))
+        page_result = await db.execute(page_query)
+        metrics = None
+    else:
+        page_result, metrics = await asyncio.gather(
+            db.execute(page_query),
+            _candidate_metrics(interview.id),
         )
-        responses = [
-            r for r in result.scalars().all()
-            if (r.qa_history and len(r.qa_history) > 0) or getattr(r, 'overall_analysis', None) is not None
-        ]
-        
-        candidates = []
-        total_duration = 0
-        sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
-        status_counts = {"selected": 0, "potential": 0, "not_selected": 0, "no_status": 0}
-        
-        for r in responses:
-            overall_analysis = await _ensure_analysis(db, r, str(interview.id))
-            
-            overall_score = overall_analysis.get("overall_score", 0)
-            communication_score = overall_analysis.get("communication_score", 0)
-            
-            status = getattr(r, 'status', None) or "no_status"
-
-            # if overall_analysis and status == "no_status":
-            #     await _assign_status_if_needed(db, r, overall_analysis)
-            #     status = r.status
-            
-            candidates.append({
-                "response_id": str(r.id),
-                "name": r.name,
-                "email": r.email,
-                "overall_score": overall_score,
-                "communication_score": communication_score,
-                "summary": _get_candidate_summary(overall_analysis),
-                "status": status,
-                "status_source": r.status_source if hasattr(r, 'status_source') else "manual",
-                "created_at": r.created_at.isoformat() if r.created_at else None
-            })
-            
-            if r.duration:
-                total_duration += r.duration
-            
-            sentiment = overall_analysis.get("sentiment", "neutral").lower()
-            sentiment_counts[sentiment] = sentiment_counts.get(sentiment, 0) + 1
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
-        candidates.sort(key=lambda x: x["overall_score"], reverse=True)
-        
-        total_responses = len(responses)
-        avg_duration = format_duration(int(total_duration / total_responses) if total_responses > 0 else 0)
+    page = page_result.scalars().all()
+    
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = _encode_cursor(page[-1].overall_score, page[-1].id)
+    
+    candidates = []
+    for r in page:
+        overall_analysis = r.overall_analysis or {}
+        status = getattr(r, 'status', None) or "no_status"
+
+        # if overall_analysis and status == "no_status":
+        #     await _assign_status_if_needed(db, r, overall_analysis)
+        #     status = r.status
         
-        # result.overall_analysis = overall_analysis
-        # await db.commit()
-        # await db.refresh(result)
-        return {
-            "ok": True,
-            "interview": {
-                "id": str(interview.id),
-                "name": interview.name,
-                "objective": interview.objective or "",
-                "description": getattr(interview, "description", None) or "",
-                "time_duration": interview.time_duration  
-            },
-            "candidates": candidates,
-            "metrics": {
-                "average_duration": avg_duration,  
-                "average_duration_seconds": int(total_duration / total_responses) if total_responses > 0 else 0,
-                "completion_rate": "100%",
-                "sentiment": sentiment_counts,
-                "status": {
-                    "total_responses": total_responses,
-                    **status_counts
-                }
-            }
-        }
+        candidates.append({
+            "response_id": str(r.id),
+            "name": r.name,
+            "email": r.email,
+            # The generated score columns are DOUBLE PRECISION and only drive ordering;
+            # the API keeps returning the scores as stored in the analysis
+            "overall_score": overall_analysis.get("overall_score", 0),
+            "communication_score": overall_analysis.get("communication_score", 0),
+            "summary": _get_candidate_summary(overall_analysis),
+            "status": status,
+            "status_source": r.status_source if hasattr(r, 'status_source') else "manual",
+            "created_at": r.created_at
+        })
+    
+    return {
+        "ok": True,
+        "interview": {
+            "id": str(interview.id),
+            "name": interview.name,
+            "objective": interview.objective or "",
+            "description": getattr(interview, "description", None) or "",
+            "time_duration": interview.time_duration  
+        },
+        "candidates": candidates,
+        "next_cursor": next_cursor,
+        "metrics": metrics
+    }
 
 
 @router.get("/get-response")
-async def get_response_detail(response_id: str = Query(...)):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, response_id)
-        interview = await get_interview_or_404(db, str(response.interview_id))
-        
-        qa_history = response.qa_history or []
-        #overall_analysis = await _ensure_analysis(db, response, str(interview.id))
-        overall_analysis = response.overall_analysis or {}
-        print(f"[DEBUG] Overall Analysis: {overall_analysis}")
-        
-        duration_seconds, duration_formatted = _calculate_duration(response)
-        question_summary = _build_question_summaries(interview, qa_history, overall_analysis)
-        transcript = _build_transcript(qa_history, response.name)
-        
-        return {
-            "ok": True,
-            "interview": {
-                "id": str(interview.id),
-                "name": interview.name,
-                "objective": interview.objective or "",
-                "time_duration": interview.time_duration
-            },
-            "candidate": {
-                "response_id": str(response.id),
-                "name": response.name,
-                "email": response.email,
-                "created_at": response.created_at.isoformat() if response.created_at else None
-            },
-            "recording": {
-                "duration": duration_formatted,
-                "duration_seconds": duration_seconds,
-                "available": duration_seconds > 0
-            },
-            "general_summary": {
-                "overall_score": overall_analysis.get("overall_score", 0),
-                "overall_feedback": overall_analysis.get("overall_feedback", "") or overall_analysis.get("overallFeedback", ""),
-                "communication_score": overall_analysis.get("communication_score", 0),
-                "communication_feedback": overall_analysis.get("communication_feedback", ""),
-                "sentiment": overall_analysis.get("sentiment", "neutral").lower(),
-                "call_summary": ""
-            },
-            "question_summary": question_summary,
-            "transcript": transcript,
-            "qa_history": qa_history,
-            "status": getattr(response, 'status', 'no_status'),
-            "status_source": getattr(response, 'status_source', 'manual')
-        }
+async def get_response_detail(response_id: str = Query(...), db: AsyncSession = Depends(get_db)):
+    response, interview = await get_response_with_interview(db, response_id)
+    
+    qa_history = response.qa_history or []
+    #overall_analysis = await _ensure_analysis(db, response, str(interview.id))
+    overall_analysis = response.overall_analysis or {}
+    logger.debug("Overall Analysis: %r", overall_analysis)
+    
+    duration_seconds, duration_formatted = _calculate_duration(response)
+    question_summary = _build_question_summaries(interview, qa_history, overall_analysis)
+    transcript = _build_transcript(qa_history, response.name)
+    
+    return {
+        "ok": True,
+        "interview": {
+            "id": str(interview.id),
+            "name": interview.name,
+            "objective": interview.objective or "",
+            "time_duration": interview.time_duration
+        },
+        "candidate": {
+            "response_id": str(response.id),
+            "name": response.name,
+            "email": response.email,
+            "created_at": response.created_at
+        },
+        "recording": {
+            "duration": duration_formatted,
+            "duration_seconds": duration_seconds,
+            "available": duration_seconds > 0
+        },
+        "general_summary": {
+            "overall_score": overall_analysis.get("overall_score", 0),
+            "overall_feedback": overall_analysis.get("overall_feedback", "") or overall_analysis.get("overallFeedback", ""),
+            "communication_score": overall_analysis.get("communication_score", 0),
+            "communication_feedback": overall_analysis.get("communication_feedback", ""),
+            "sentiment": overall_analysis.get("sentiment", "neutral").lower(),
+            "call_summary": ""
+        },
+        "analysis_ready": bool(overall_analysis),
+        "question_summary": question_summary,
+        "transcript": transcript,
+        "qa_history": qa_history,
+        "status": getattr(response, 'status', 'no_status'),
+        "status_source": getattr(response, 'status_source', 'manual')
+    }
 
 @router.post("/update-response-status")
-async def update_response_status(request: UpdateResponseStatusRequest):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, request.response_id)
-        valid_statuses = ["selected", "shortlisted", "rejected", "not_selected", "potential", "no_status"]
-        if request.status not in valid_statuses:
-            raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
-        
-        response.status = request.status
-        response.status_source = "manual"
-        await db.commit()
-        await db.refresh(response)
-        
-        return {"ok": True, "status": response.status, "status_source": response.status_source}
+async def update_response_status(request: UpdateResponseStatusRequest, db: AsyncSession = Depends(get_db)):
+    response = await get_response_or_404(db, request.response_id)
+    valid_statuses = ["selected", "shortlisted", "rejected", "not_selected", "potential", "no_status"]
+    if request.status not in valid_statuses:
+        raise HTTPException(status_code=400, detail=f"Invalid status. Must be one of: {', '.join(valid_statuses)}")
+    
+    response.status = request.status
+    response.status_source = "manual"
+    await db.commit()
+    await db.refresh(response)
+    
+    return {"ok": True, "status": response.status, "status_source": response.status_source}
 
 @router.post("/upload-candidate-image")
-async def upload_candidate_image(image:UploadFile = File(...), response_id:str = Form(...)):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, response_id)
-        content = await image.read()
-        file_extension = image.filename.split('.')[-1].lower()
+async def upload_candidate_image(image:UploadFile = File(...), response_id:str = Form(...), db: AsyncSession = Depends(get_db)):
+    response = await get_response_or_404(db, response_id)
+    # Trust the image's magic bytes over the client-supplied filename
+    header = await image.read(IMAGE_SNIFF_BYTES)
+    await image.seek(0)
+    file_extension = sniff_image_extension(header)
+    if not file_extension:
+        raise HTTPException(status_code=400, detail="Unsupported image type. Allowed: jpg, png, gif, webp")
 
-        storage_url = await storage_service.save_candidate_image(content, response_id, file_extension)
+    storage_url = await storage_service.save_candidate_image(image.file, response_id, file_extension)
 
-        response.candidate_image_url = storage_url
-        await db.commit()
-        await db.refresh(response)
-        return {"ok": True, "storage_path": storage_url}
+    response.candidate_image_url = storage_url
+    await db.commit()
+    await db.refresh(response)
+    return {"ok": True, "storage_path": storage_url}
 
 @router.post("/upload-candidate-video")
-async def upload_candidate_video(response_id:str = Form(...)):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, response_id)
-        # Extension will be auto-detected from chunks
-        storage_url = await storage_service.save_candidate_video(response_id)
-
-        response.candidate_video_url = storage_url
-        await db.commit()
-        await db.refresh(response)
-        return {"ok": True, "message":"Uploaded successfully", "storage_path": storage_url}
+async def upload_candidate_video(response_id:str = Form(...), db: AsyncSession = Depends(get_db)):
+    storage_url = await store_candidate_video_or_404(db, response_id)
+    return {"ok": True, "message":"Uploaded successfully", "storage_path": storage_url}
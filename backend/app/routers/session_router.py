@@ -1,189 +1,178 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
 from datetime import datetime, timezone
-from sqlalchemy import update, func, select
+from sqlalchemy import update, func, select, exists, or_
 import uuid
 import asyncio
-from db import AsyncSessionLocal
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import get_db
 from models import Interview, Response
 from schemas.interview_schema import StartInterviewRequest, EndInterviewRequest
-from utils.interview_utils import get_interview_or_404, get_response_or_404, commit_and_refresh, get_questions_list
-from utils.redis_utils import create_session, set_session_meta
-from services.llm_service import llm_service
-from services.storage_service import storage_service
+from utils.interview_utils import get_interview_cached, get_response_with_interview, get_questions_list
+from utils.redis_utils import create_session, set_session_meta, get_video_chunk_count
+from services.analysis_service import analysis_service
 import secrets
-from middleware.auth_middleware import safe_route
+from utils.logger import get_logger
 
 router = APIRouter(prefix="/api/interview", tags=["sessions"])
+logger = get_logger(__name__)
 
-@router.post("/start-interview")
-@safe_route
-async def start_interview(request: StartInterviewRequest):
-    async with AsyncSessionLocal() as db:
-        interview = await get_interview_or_404(db, request.interview_id)
-        
-        if not interview.is_open:
-            raise HTTPException(status_code=403, detail="This interview is currently closed. Please contact the HR team.")
-        
-        email = request.candidate_email.lower().strip() if request.candidate_email else None
-        
-        if email:
-            existing_responses = await db.execute(
-                select(Response)
-                .where(Response.interview_id == interview.id)
-                .where(Response.email == email)
-                .where(Response.is_completed == True)
-            )
-            existing = existing_responses.scalars().first()
-            if existing:
-                raise HTTPException(
-                    status_code=403,
-                    detail="You have already completed this interview. Each candidate can only take the interview once."
-                )
-            
-            if interview.respondents and len(interview.respondents) > 0:
-                if email not in [r.lower().strip() for r in interview.respondents]:
-                    raise HTTPException(
-                        status_code=403,
-                        detail="Your email address is not authorized to take this interview. Please contact the HR team if you believe this is an error."
-                    )
-        
-        response = Response(
-            interview_id=interview.id,
-            name=request.candidate_name,
-            email=email or request.candidate_email,
-            start_time=datetime.now(timezone.utc)
-        )
-        db.add(response)
-        await commit_and_refresh(db, response)
-        
-        await db.execute(
-            update(Interview)
-            .where(Interview.id == interview.id)
-            .values(response_count=func.coalesce(Interview.response_count, 0) + 1)
-        )
-        await db.commit()
+VIDEO_CHUNK_WAIT_TIMEOUT = 10
+VIDEO_CHUNK_POLL_INTERVAL = 0.25
+
+async def _wait_for_video_chunks(response_id: str, expected_chunks: Optional[int]):
+    # Wait until the client's reported chunk count has been saved, or, for
+    # clients that don't report it, until the saved count stops growing.
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + VIDEO_CHUNK_WAIT_TIMEOUT
+    interval = VIDEO_CHUNK_POLL_INTERVAL if expected_chunks is not None else 1
+    last_count = -1
+    while loop.time() < deadline:
+        uploaded = await get_video_chunk_count(response_id)
+        if expected_chunks is not None and uploaded >= expected_chunks:
+            return
+        if expected_chunks is None and uploaded == last_count:
+            return
+        last_count = uploaded
+        await asyncio.sleep(interval)
+    logger.warning("Timed out waiting for video chunks for response_id: %s", response_id)
 
-        session_id = f"ws_{interview.id}_{response.id}"
-        session_token = secrets.token_urlsafe(24)
+async def _merge_video_after_upload(response_id: str, expected_chunks: Optional[int]):
+    if expected_chunks != 0:
         try:
-            await create_session(session_id)
-            await set_session_meta(session_id, {
-                "interview_id": str(interview.id),
-                "response_id": str(response.id),
-                "mode": interview.question_mode,
-                "session_token": session_token,
-                "started_at": datetime.now(timezone.utc).isoformat()
-            })
+            await _wait_for_video_chunks(response_id, expected_chunks)
         except Exception as e:
-            print(f"[ERROR] Redis session init failed: {e}")
+            logger.warning("Video chunk count unavailable for response_id: %s: %s", response_id, e)
+    await analysis_service.merge_candidate_video(response_id)
 
-        duration_minutes = None
-        if interview.time_duration and interview.time_duration.isdigit():
-            duration_minutes = int(interview.time_duration)
+@router.post("/start-interview")
+async def start_interview(request: StartInterviewRequest, db: AsyncSession = Depends(get_db)):
+    interview = await get_interview_cached(request.interview_id, db)
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    
+    if not interview.is_open:
+        raise HTTPException(status_code=403, detail="This interview is currently closed. Please contact the HR team.")
+    
+    email = request.candidate_email.lower().strip() if request.candidate_email else None
+    
+    if email:
+        # One round trip answers both "already completed?" and "on the respondents list?"
+        respondents = func.unnest(Interview.respondents).table_valued("email").render_derived()
+        already_completed = exists().where(
+            Response.interview_id == Interview.id,
+            Response.email == email,
+            Response.is_completed == True,
+        )
+        authorized = or_(
+            func.coalesce(func.cardinality(Interview.respondents), 0) == 0,
+            exists().select_from(respondents).where(func.lower(func.trim(respondents.c.email)) == email),
+        )
+        completed, allowed = (await db.execute(
+            select(already_completed, authorized).where(Interview.id == interview.id)
+        )).one()
+        if completed:
+            raise HTTPException(
+                status_code=403,
+                detail="You have already completed this interview. Each candidate can only take the interview once."
+            )
         
-        return {
-            "ok": True,
-            "response_id": str(response.id),
+        if not allowed:
+            raise HTTPException(
+                status_code=403,
+                detail="Your email address is not authorized to take this interview. Please contact the HR team if you believe this is an error."
+            )
+    
+    response = Response(
+        interview_id=interview.id,
+        name=request.candidate_name,
+        email=email or request.candidate_email,
+        start_time=datetime.now(timezone.utc)
+    )
+    db.add(response)
+    # The INSERT is autoflushed before this UPDATE; both commit together
+    await db.execute(
+        update(Interview)
+        .where(Interview.id == interview.id)
+        .values(response_count=func.coalesce(Interview.response_count, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+    session_id = f"ws_{interview.id}_{response.id}"
+    session_token = secrets.token_urlsafe(24)
+    try:
+        await create_session(session_id)
+        await set_session_meta(session_id, {
             "interview_id": str(interview.id),
-            "session_id": session_id,
-            "session_token": session_token,
+            "response_id": str(response.id),
             "mode": interview.question_mode,
-            "duration_minutes": duration_minutes,
-            "start_time": response.start_time.isoformat() if response.start_time else None
-        }
+            "session_token": session_token,
+            "started_at": datetime.now(timezone.utc).isoformat()
+        })
+    except Exception as e:
+        print(f"[ERROR] Redis session init failed: {e}")
+
+    duration_minutes = None
+    if interview.time_duration and interview.time_duration.isdigit():
+        duration_minutes = int(interview.time_duration)
+    
+    return {
+        "ok": True,
+        "response_id": str(response.id),
+        "interview_id": str(interview.id),
+        "session_id": session_id,
+        "session_token": session_token,
+        "mode": interview.question_mode,
+        "duration_minutes": duration_minutes,
+        "start_time": response.start_time
+    }
 
 @router.post("/end-interview")
-@safe_route
-async def end_interview(request: EndInterviewRequest):
-    async with AsyncSessionLocal() as db:
-        response = await get_response_or_404(db, request.response_id)
-        interview = await get_interview_or_404(db, str(response.interview_id))
-        
-        response.is_completed = True
-        
-        end_time = datetime.now(timezone.utc)
-        if not response.end_time:
-            response.end_time = end_time
-        elif response.end_time < end_time:
-            response.end_time = end_time
-        
-        if response.start_time and response.end_time:
-            duration_delta = response.end_time - response.start_time
-            duration_seconds = int(duration_delta.total_seconds())
-            response.duration = duration_seconds
-            print(f"[DEBUG] Interview duration calculated: {duration_seconds} seconds ({duration_seconds // 60}m {duration_seconds % 60}s)")
-        
-        qa_history = response.qa_history or []
-        if len(qa_history) > 0:
-            overall_analysis = getattr(response, "overall_analysis", None)
-            if not overall_analysis:
-                try:
-                    if interview.context:
-                        final_analysis = await llm_service.generate_final_analysis(
-                            str(interview.id), qa_history
-                        )
-                        try:
-                            setattr(response, "overall_analysis", final_analysis)
-                            
-                            # if final_analysis and (not hasattr(response, 'status') or not response.status or response.status == "no_status"):
-                            #     score = final_analysis.get("overall_score", 0)
-                            #     if score >= 80:
-                            #         response.status = "selected"
-                            #     elif score >= 60:
-                            #         response.status = "potential"
-                            #     elif score < 40:
-                            #         response.status = "not_selected"
-                            #     else:
-                            #         response.status = "potential"
-                            response.status_source = "manual"
-                        except Exception as e:
-                            print(f"[WARN] Failed to set overall_analysis: {e}")
-                except Exception as e:
-                    print(f"[WARN] Final analysis generation failed: {e}")
-        
-        await db.commit()
-        
-        # Trigger video merge automatically if chunks exist
-        video_merged = False
-        video_url = None
-        try:
-            # Wait a moment to ensure all chunks are fully uploaded
-            await asyncio.sleep(2)
-            
-            # Attempt to merge video chunks
-            storage_url = await storage_service.save_candidate_video(str(response.id))
-            video_url = storage_url
-            video_merged = True
-            
-            # Update response with video URL
-            response.candidate_video_url = storage_url
-            await db.commit()
-            print(f"[DEBUG] Video merged successfully for response_id: {response.id}, URL: {storage_url}")
-        except FileNotFoundError:
-            # No chunks found - this is okay, interview might not have recording
-            print(f"[DEBUG] No video chunks found for response_id: {response.id} - skipping merge")
-        except Exception as e:
-            # Log error but don't fail the interview end
-            print(f"[WARN] Failed to merge video for response_id: {response.id}: {str(e)}")
-        
-        if interview.question_mode == "dynamic":
-            total_questions = interview.question_count or 0
-        else:
-            questions_list = get_questions_list(interview)
-            total_questions = len(questions_list) if questions_list else 0
-        
-        questions_answered = len(qa_history)
-        is_partially_complete = questions_answered < total_questions if total_questions > 0 else False
-        
-        return {
-            "ok": True,
-            "message": "Interview ended successfully",
-            "questions_answered": questions_answered,
-            "total_questions": total_questions,
-            "is_partially_complete": is_partially_complete,
-            "end_time": response.end_time.isoformat() if response.end_time else None,
-            "duration_seconds": response.duration if response.duration else None,
-            "video_merged": video_merged,
-            "video_url": video_url
-        }
+async def end_interview(request: EndInterviewRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    response, interview = await get_response_with_interview(db, request.response_id)
+    
+    response.is_completed = True
+    
+    end_time = datetime.now(timezone.utc)
+    if not response.end_time:
+        response.end_time = end_time
+    elif response.end_time < end_time:
+        response.end_time = end_time
+    
+    if response.start_time and response.end_time:
+        duration_delta = response.end_time - response.start_time
+        duration_seconds = int(duration_delta.total_seconds())
+        response.duration = duration_seconds
+        logger.debug("Interview duration calculated: %d seconds", duration_seconds)
+    
+    await db.commit()
+    
+    # Final analysis and video merge run after the response is sent
+    qa_history = response.qa_history or []
+    analysis_scheduled = bool(qa_history) and bool(interview.context) and not response.overall_analysis
+    if analysis_scheduled:
+        background_tasks.add_task(analysis_service.run_final_analysis, str(response.id))
+    background_tasks.add_task(_merge_video_after_upload, str(response.id), request.video_chunks)
+    
+    if interview.question_mode == "dynamic":
+        total_questions = interview.question_count or 0
+    else:
+        questions_list = get_questions_list(interview)
+        total_questions = len(questions_list) if questions_list else 0
+    
+    questions_answered = len(qa_history)
+    is_partially_complete = questions_answered < total_questions if total_questions > 0 else False
+    
+    return {
+        "ok": True,
+        "message": "Interview ended successfully",
+        "questions_answered": questions_answered,
+        "total_questions": total_questions,
+        "is_partially_complete": is_partially_complete,
+        "end_time": response.end_time,
+        "duration_seconds": response.duration if response.duration else None,
+        "analysis_status": "analyzing" if analysis_scheduled else None,
+        "video_status": "merging"
+    }
 
@@ -11,6 +11,7 @@ class StartInterviewRequest(BaseModel):
 class EndInterviewRequest(BaseModel):
     response_id: str
     reason: Optional[str] = "Candidate requested to end interview"
+    video_chunks: Optional[int] = None
 
 class SubmitAnswerRequest(BaseModel):
     response_id: str
@@ -0,0 +1,60 @@
+# Post-interview work that runs after the HTTP response is sent
+
+from sqlalchemy import select, update, or_
+from db import AsyncSessionLocal
+from models import Response
+from services.llm_service import llm_service
+from services.storage_service import storage_service
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class AnalysisService:
+    async def run_final_analysis(self, response_id: str) -> None:
+        """Generate and store the final analysis unless one was already saved"""
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(
+                select(Response.interview_id, Response.qa_history).where(Response.id == response_id)
+            )).first()
+            if not row or not row.qa_history:
+                return
+
+            try:
+                analysis = await llm_service.generate_final_analysis(str(row.interview_id), row.qa_history)
+            except Exception:
+                logger.warning("Final analysis generation failed for response_id: %s", response_id, exc_info=True)
+                return
+
+            # Only fill an empty analysis so a repeated task never overwrites a stored one
+            await db.execute(
+                update(Response)
+                .where(Response.id == response_id)
+                .where(or_(Response.overall_analysis.is_(None), Response.overall_analysis == {}))
+                .values(overall_analysis=analysis)
+            )
+            await db.commit()
+
+    async def merge_candidate_video(self, response_id: str) -> None:
+        """Merge uploaded video chunks and store the resulting URL"""
+        try:
+            storage_url = await storage_service.save_candidate_video(response_id)
+        except FileNotFoundError:
+            # No chunks found - this is okay, interview might not have recording
+            logger.debug("No video chunks found for response_id: %s - skipping merge", response_id)
+            return
+        except Exception:
+            logger.warning("Failed to merge video for response_id: %s", response_id, exc_info=True)
+            return
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Response)
+                .where(Response.id == response_id)
+                .values(candidate_video_url=storage_url)
+            )
+            await db.commit()
+        logger.debug("Video merged successfully for response_id: %s, URL: %s", response_id, storage_url)
+
+
+analysis_service = AnalysisService()
@@ -1,5 +1,6 @@
 # LLM (OpenAI, Anthropic, etc.)
 
+import hashlib
 import json
 import re
 from typing import Dict, List, Optional, Union
@@ -9,9 +10,88 @@ from openai import AsyncOpenAI
 from openai import AsyncAzureOpenAI
 import uuid
 from services.summarization_service import summarization_service
-from db import AsyncSessionLocal
-from models import Interview
-from sqlalchemy import select
+from utils.interview_utils import get_interview_cached
+from utils.redis_utils import get_cached, set_cached
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FINAL_ANALYSIS_CACHE_TTL = 24 * 3600
+
+# Analysis prompts keep their static instructions in the system message so every
+# request shares an identical prefix for the provider's prompt cache; the
+# per-call data is sent last in the user message.
+FINAL_ANALYSIS_SYSTEM_PROMPT = """You are an expert in analyzing interview transcripts. You must only use the main questions provided and not generate or infer additional questions.
+                
+                Analyse the interview qa summary given by the user and provide structured feedback. Based on this qa summary, generate the following analytics in JSON format:
+
+                1. Overall Score (0-100) and Overall Feedback (60 words) - take into account the following factors:
+
+                - Communication Skills: Evaluate the use of language, grammar, and vocabulary. Assess if the interviewee communicated effectively and clearly.
+                - Time Taken to Answer: Consider if the interviewee answered promptly or took too long. Note if they were concise or tended to ramble.
+                - Confidence: Assess the interviewee's confidence level. Were they assertive and self-assured, or did they seem hesitant and unsure?
+                - Clarity: Evaluate the clarity of their answers. Were their responses well-structured and easy to understand?
+                - Attitude: Consider the interviewee's attitude towards the interview and questions. Were they positive, respectful, and engaged?
+                - Relevance of Answers: Determine if the interviewee's responses are relevant to the questions asked. Assess if they stayed on topic or veered off track.
+                - Depth of Knowledge: Evaluate the interviewee's depth of understanding and knowledge in the subject matter. Look for detailed and insightful answers.
+                - Problem-Solving Ability: Consider how the interviewee approaches problem-solving questions. Assess their logical reasoning and analytical skills.
+                - Examples and Evidence: Note if the interviewee provides concrete examples or evidence to support their answers. This can indicate experience and credibility.
+                - Listening Skills: Look for signs that the interviewee is actively listening and responding appropriately to follow-up questions.
+                - Consistency: Evaluate if the interviewee's answers are consistent throughout the interview or if they contradict themselves.
+                - Adaptability: Assess how well the interviewee adapts to different types of questions, including unexpected or challenging ones.
+
+                2. Communication Skills: Score (0-10) and Feedback (60 words). Rating system and guidelines for communication skills is as following.
+
+                    - 10: Fully operational command, use of English is appropriate, accurate, fluent, shows complete understanding.
+                    - 09: Fully operational command with occasional inaccuracies and inappropriate usage. May misunderstand unfamiliar situations but handles complex arguments well.
+                    - 08: Operational command with occasional inaccuracies, inappropriate usage, and misunderstandings. Handles complex language and detailed reasoning well.
+                    - 07: Effective command despite some inaccuracies, inappropriate usage, and misunderstandings. Can use and understand reasonably complex language, especially in familiar situations.
+                    - 06: Partial command, copes with overall meaning, frequent mistakes. Handles basic communication in their field.
+                    - 05: Basic competence limited to familiar situations with frequent problems in understanding and expression.
+                    - 04: Understands only general meaning in very familiar situations, with frequent communication breakdowns.
+                    - 03: Has great difficulty understanding spoken English.
+                    - 02: Has no ability to use the language except a few isolated words.
+                    - 01: Did not answer the questions.
+
+                3. Summary for each main interview question (use the main questions listed above):
+
+                - Use ONLY the main questions provided above, it should output all the questions with the numbers even if it's not found in the transcript.
+                - Follow the below rules when outputing the question and summary
+                    - If a main interview question isn't found in the transcript, then output the main question and give the summary as "Not Asked"
+                    - If a main interview question is found in the transcript but an answer couldn't be found, then output the main question and give the summary as "Not Answered"
+                    - If a main interview question is found in the transcript and an answer can also be found, then,
+
+                        - For each main question (q), provide a summary that includes:
+                            a) The candidate's response to the main question
+                            b) Any follow-up questions that were asked related to this main question and their answers
+                        - The summary should be a cohesive paragraph encompassing all related information for each main question
+
+                4. Create a 10 to 15 words summary regarding the soft skills considering factors such as confidence, leadership, adaptability, critical thinking and decision making.
+
+                Ensure the output is in valid JSON format with the following structure:
+
+                {
+                "overallScore": number,
+                "overallFeedback": string,
+                "communication": { "score": number, "feedback": string },
+                "questionSummaries": [{ "question": string, "summary": string }],
+                "softSkillSummary": string
+                }
+
+                IMPORTANT: Only use the main questions provided. Do not generate or infer additional questions such as follow-up questions."""
+
+ANALYZE_RESPONSE_SYSTEM_PROMPT = """You are an expert in analyzing interview answers.\n\nEvaluate the user's question and answer (1-10 scale) and return JSON:\n{"relevance_score": int, "completeness_score": int, "clarity_score": int, "overall_score": int, "strengths": [str], "weaknesses": [str], "suggestions": [str]}"""
+
+def _to_score(value) -> float:
+    # Scores feed numeric generated columns, so anything non-numeric becomes 0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+def _final_analysis_cache_key(interview_id: str, qa_history: List[Dict]) -> str:
+    canonical = json.dumps(qa_history, sort_keys=True, separators=(",", ":"), default=str)
+    return f"final-analysis:{interview_id}:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
 
 class LLMService:
     def __init__(self):
@@ -227,57 +307,55 @@ class LLMService:
     
     async def generate_next_dynamic_question(self, interview_id: str, previous_answers: List[Dict]) -> Dict:
         try:
-            async with AsyncSessionLocal() as db:
-                result = await db.execute(select(Interview).where(Interview.id == interview_id))
-                interview = result.scalar_one_or_none()
-                
-                if not interview or not interview.context:
-                    return {"error": "No context available"}
-                
-                context_summary = interview.context.get('context_summary', 'No context available')
-                
-                answers_summary = ""
-                for i, ans in enumerate(previous_answers[-3:], 1):
-                    q = ans.get('question', 'N/A')
-                    a = ans.get('answer', 'N/A')[:200]  
-                    answers_summary += f"Q{i}: {q}\nA{i}: {a}...\n\n"
-                
-                prompt = f"""Generate the next interview question based on this context:
+            interview = await get_interview_cached(interview_id)
+            
+            if not interview or not interview.context:
+                return {"error": "No context available"}
+            
+            context_summary = interview.context.get('context_summary', 'No context available')
+            
+            answers_summary = ""
+            for i, ans in enumerate(previous_answers[-3:], 1):
+                q = ans.get('question', 'N/A')
+                a = ans.get('answer', 'N/A')[:200]  
+                answers_summary += f"Q{i}: {q}\nA{i}: {a}...\n\n"
+            
+            prompt = f"""Generate the next interview question based on this context:
 
-                Job Role: {context_summary}
+            Job Role: {context_summary}
 
-                Previous Q&A:
-                {answers_summary if answers_summary else "This is the first question."}
+            Previous Q&A:
+            {answers_summary if answers_summary else "This is the first question."}
 
-                Generate a relevant follow-up question that:
-                - Builds on the candidate's previous answers
-                - Deepens understanding of their experience/skills
-                - Is specific to the role
-                - Is professional and conversational
+            Generate a relevant follow-up question that:
+            - Builds on the candidate's previous answers
+            - Deepens understanding of their experience/skills
+            - Is specific to the role
+            - Is professional and conversational
 
-                Return ONLY a JSON object with "question" and "text" fields (both contain the same question text).
+            Return ONLY a JSON object with "question" and "text" fields (both contain the same question text).
 
-                Return only the JSON object, no extra text."""
-                
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[{"role": "user", "content": prompt}],
-                    max_tokens=200,
-                    temperature=0.5
-                )
-                
-                question_text = response.choices[0].message.content
-                question = self._parse_json(question_text)
-                
-                if isinstance(question, list):
-                    question = question[0] if question else {}
-                
-                question['id'] = str(uuid.uuid4())
-                if 'text' not in question:
-                    question['text'] = question.get('question', '')
-                
-                return question
-                
+            Return only the JSON object, no extra text."""
+            
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=200,
+                temperature=0.5
+            )
+            
+            question_text = response.choices[0].message.content
+            question = self._parse_json(question_text)
+            
+            if isinstance(question, list):
+                question = question[0] if question else {}
+            
+            question['id'] = str(uuid.uuid4())
+            if 'text' not in question:
+                question['text'] = question.get('question', '')
+            
+            return question
+            
         except Exception as e:
             print(f"Error generating next dynamic question: {str(e)}")
             return {}
@@ -286,13 +364,12 @@ class LLMService:
         """Analyze a single candidate answer - simplified to reduce tokens"""
         try:
             question = question_context.get('question', '')
-            system_prompt = "You are an expert in analyzing interview answers."
-            user_prompt = f"""Question: {question}\nAnswer: {transcript}\n\nEvaluate (1-10 scale) and return JSON:\n{{"relevance_score": int, "completeness_score": int, "clarity_score": int, "overall_score": int, "strengths": [str], "weaknesses": [str], "suggestions": [str]}}"""
+            user_prompt = f"Question: {question}\nAnswer: {transcript}"
             
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": ANALYZE_RESPONSE_SYSTEM_PROMPT},
                     {"role": "user", "content": user_prompt}
                 ],
                 response_format={"type": "json_object"},
@@ -342,124 +419,82 @@ class LLMService:
             return []
 
     async def generate_final_analysis(self, interview_id: str, qa_history: List[Dict]) -> Dict:
+        """Final analysis, served from Redis when the same QA history was already analysed"""
+        cache_key = _final_analysis_cache_key(str(interview_id), qa_history)
+        try:
+            cached = await get_cached(cache_key)
+        except Exception as e:
+            logger.warning("Final analysis cache read failed: %s", e)
+            cached = None
+        if cached:
+            logger.debug("Final analysis cache hit for interview %s", interview_id)
+            return json.loads(cached)
+
+        result = await self._generate_final_analysis(interview_id, qa_history)
+        if "error" not in result:
+            try:
+                await set_cached(cache_key, json.dumps(result).encode("utf-8"), FINAL_ANALYSIS_CACHE_TTL)
+            except Exception as e:
+                logger.warning("Final analysis cache write failed: %s", e)
+        return result
+
+    async def _generate_final_analysis(self, interview_id: str, qa_history: List[Dict]) -> Dict:
         """Generate final analysis - Followup AI style"""
         try: 
-            async with AsyncSessionLocal() as db:
-                interview = (await db.execute(select(Interview).where(Interview.id == interview_id))).scalar_one_or_none()
-                if not interview:
-                    return {"error": "Interview not found"}
-                
-                # Build transcript
-                # transcript = "\n".join([
-                #     f"{'Interviewer' if 'question' in qa else 'Candidate'}: {qa.get('question') or qa.get('answer', '')}"
-                #     for qa in qa_history
-                #     if qa.get('question') or qa.get('answer')
-                # ])
-                # print(f"[DEBUG] Transcript: {transcript}")
-                
-                # questions_list = interview.llm_generated_questions.get('questions', []) if isinstance(interview.llm_generated_questions, dict) else []
-                # print(f"[DEBUG] Questions List: {questions_list}")
-                # main_questions = [q.get('question', q.get('text', '')) for q in questions_list if isinstance(q, dict)]
-                # print(f"[DEBUG] Main Questions: {main_questions}")
-                # main_questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(main_questions)])
-                # print(f"[DEBUG] Main Questions Text: {main_questions_text}")
-
-                # transcript = []
-                # for qa in qa_history:
-                #     question = qa.get('question', '')
-                #     answer = qa.get('answer', '')
-
-                #     transcript = "\n".join([f"Question: {question}\nAnswer: {answer}"])
-
-                print(f"[DEBUG] Transcript: {qa_history}")
-                system_prompt = "You are an expert in analyzing interview transcripts. You must only use the main questions provided and not generate or infer additional questions."
-                
-                user_prompt = f"""Analyse the following interview qa summary and provide structured feedback:
-                ###
-                QA Summary: {qa_history}
-                
-                Based on this qa summary, generate the following analytics in JSON format:
-
-                1. Overall Score (0-100) and Overall Feedback (60 words) - take into account the following factors:
-
-                - Communication Skills: Evaluate the use of language, grammar, and vocabulary. Assess if the interviewee communicated effectively and clearly.
-                - Time Taken to Answer: Consider if the interviewee answered promptly or took too long. Note if they were concise or tended to ramble.
-                - Confidence: Assess the interviewee's confidence level. Were they assertive and self-assured, or did they seem hesitant and unsure?
-                - Clarity: Evaluate the clarity of their answers. Were their responses well-structured and easy to understand?
-                - Attitude: Consider the interviewee's attitude towards the interview and questions. Were they positive, respectful, and engaged?
-                - Relevance of Answers: Determine if the interviewee's responses are relevant to the questions asked. Assess if they stayed on topic or veered off track.
-                - Depth of Knowledge: Evaluate the interviewee's depth of understanding and knowledge in the subject matter. Look for detailed and insightful answers.
-                - Problem-Solving Ability: Consider how the interviewee approaches problem-solving questions. Assess their logical reasoning and analytical skills.
-                - Examples and Evidence: Note if the interviewee provides concrete examples or evidence to support their answers. This can indicate experience and credibility.
-                - Listening Skills: Look for signs that the interviewee is actively listening and responding appropriately to follow-up questions.
-                - Consistency: Evaluate if the interviewee's answers are consistent throughout the interview or if they contradict themselves.
-                - Adaptability: Assess how well the interviewee adapts to different types of questions, including unexpected or challenging ones.
-
-                2. Communication Skills: Score (0-10) and Feedback (60 words). Rating system and guidelines for communication skills is as following.
-
-                    - 10: Fully operational command, use of English is appropriate, accurate, fluent, shows complete understanding.
-                    - 09: Fully operational command with occasional inaccuracies and inappropriate usage. May misunderstand unfamiliar situations but handles complex arguments well.
-                    - 08: Operational command with occasional inaccuracies, inappropriate usage, and misunderstandings. Handles complex language and detailed reasoning well.
-                    - 07: Effective command despite some inaccuracies, inappropriate usage, and misunderstandings. Can use and understand reasonably complex language, especially in familiar situations.
-                    - 06: Partial command, copes with overall meaning, frequent mistakes. Handles basic communication in their field.
-                    - 05: Basic competence limited to familiar situations with frequent problems in understanding and expression.
-                    - 04: Understands only general meaning in very familiar situations, with frequent communication breakdowns.
-                    - 03: Has great difficulty understanding spoken English.
-                    - 02: Has no ability to use the language except a few isolated words.
-                    - 01: Did not answer the questions.
-
-                3. Summary for each main interview question (use the main questions listed above):
-
-                - Use ONLY the main questions provided above, it should output all the questions with the numbers even if it's not found in the transcript.
-                - Follow the below rules when outputing the question and summary
-                    - If a main interview question isn't found in the transcript, then output the main question and give the summary as "Not Asked"
-                    - If a main interview question is found in the transcript but an answer couldn't be found, then output the main question and give the summary as "Not Answered"
-                    - If a main interview question is found in the transcript and an answer can also be found, then,
-
-                        - For each main question (q), provide a summary that includes:
-                            a) The candidate's response to the main question
-                            b) Any follow-up questions that were asked related to this main question and their answers
-                        - The summary should be a cohesive paragraph encompassing all related information for each main question
-
-                4. Create a 10 to 15 words summary regarding the soft skills considering factors such as confidence, leadership, adaptability, critical thinking and decision making.
-
-                Ensure the output is in valid JSON format with the following structure:
-
-                {{
-                "overallScore": number,
-                "overallFeedback": string,
-                "communication": {{ "score": number, "feedback": string }},
-                "questionSummaries": [{{ "question": string, "summary": string }}],
-                "softSkillSummary": string
-                }}
-
-                IMPORTANT: Only use the main questions provided. Do not generate or infer additional questions such as follow-up questions."""
-                                                
-                response = await self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    response_format={"type": "json_object"},
-                    max_tokens=1500,
-                    temperature=0.3
-                )
-                
-                analysis = self._parse_json(response.choices[0].message.content)
-                print(f"[DEBUG] Analysis: {analysis}")
-                
-                result = {
-                    "overall_score": analysis.get("overallScore", 0),
-                    "overall_feedback": ' '.join(analysis.get("overallFeedback", "").split()[:60]),
-                    "communication_score": analysis.get("communication", {}).get("score", 0) if isinstance(analysis.get("communication"), dict) else 0,
-                    "communication_feedback": ' '.join((analysis.get("communication", {}).get("feedback", "") if isinstance(analysis.get("communication"), dict) else "").split()[:60]),
-                    "question_summaries": analysis.get("questionSummaries", []),
-                    "soft_skill_summary": ' '.join(analysis.get("softSkillSummary", "").split()[:15]),
-                }
-                
-                return result
-                
+            interview = await get_interview_cached(interview_id)
+            if not interview:
+                return {"error": "Interview not found"}
+            
+            # Build transcript
+            # transcript = "\n".join([
+            #     f"{'Interviewer' if 'question' in qa else 'Candidate'}: {qa.get('question') or qa.get('answer', '')}"
+            #     for qa in qa_history
+            #     if qa.get('question') or qa.get('answer')
+            # ])
+            # print(f"[DEBUG] Transcript: {transcript}")
+            
+            # questions_list = interview.llm_generated_questions.get('questions', []) if isinstance(interview.llm_generated_questions, dict) else []
+            # print(f"[DEBUG] Questions List: {questions_list}")
+            # main_questions = [q.get('question', q.get('text', '')) for q in questions_list if isinstance(q, dict)]
+            # print(f"[DEBUG] Main Questions: {main_questions}")
+            # main_questions_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(main_questions)])
+            # print(f"[DEBUG] Main Questions Text: {main_questions_text}")
+
+            # transcript = []
+            # for qa in qa_history:
+            #     question = qa.get('question', '')
+            #     answer = qa.get('answer', '')
+
+            #     transcript = "\n".join([f"Question: {question}\nAnswer: {answer}"])
+
+            logger.debug("Transcript: %r", qa_history)
+            user_prompt = f"QA Summary: {qa_history}"
+                                            
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": FINAL_ANALYSIS_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=1500,
+                temperature=0.3
+            )
+            
+            analysis = self._parse_json(response.choices[0].message.content)
+            logger.debug("Analysis: %r", analysis)
+            
+            result = {
+                "overall_score": _to_score(analysis.get("overallScore", 0)),
+                "overall_feedback": ' '.join(analysis.get("overallFeedback", "").split()[:60]),
+                "communication_score": _to_score(analysis.get("communication", {}).get("score", 0)) if isinstance(analysis.get("communication"), dict) else 0,
+                "communication_feedback": ' '.join((analysis.get("communication", {}).get("feedback", "") if isinstance(analysis.get("communication"), dict) else "").split()[:60]),
+                "question_summaries": analysis.get("questionSummaries", []),
+                "soft_skill_summary": ' '.join(analysis.get("softSkillSummary", "").split()[:15]),
+            }
+            
+            return result
+            
         except Exception as e:
             print(f"Error generating final analysis: {str(e)}")
             raise
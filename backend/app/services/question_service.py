@@ -1,10 +1,15 @@
 # Service layer for question-related business logic
 
+import asyncio
+from contextlib import asynccontextmanager
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm.attributes import flag_modified
-from utils.interview_utils import normalize_question, get_questions_list
+from utils.interview_utils import normalize_question, get_questions_list, invalidate_interview_cache
 from services.summarization_service import summarization_service
 from services.llm_service import llm_service
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class QuestionService:
@@ -17,10 +22,18 @@ class QuestionService:
         return (interview.context or {}).get('difficulty_level', 'medium')
     
     @staticmethod
-    async def commit_changes(db, model, *field_names):
+    @asynccontextmanager
+    async def transaction(db, model, *field_names):
+        """Apply the block's changes to model in a single commit; they are rolled back if it raises"""
+        try:
+            yield
+        except BaseException:
+            await db.rollback()
+            raise
         for field_name in field_names:
             flag_modified(model, field_name)
         await db.commit()
+        await invalidate_interview_cache(model.id)
     
     @staticmethod
     async def handle_predefined_questions(
@@ -40,13 +53,10 @@ class QuestionService:
         questions = [normalize_question(q) for q in result.get('questions', [])[:target_count]]
         generated_description = result.get('description', '')
         
-        interview.llm_generated_questions = {"questions": questions}
-        
-        if generated_description and not interview.description:
-            interview.description = generated_description
-            await QuestionService.commit_changes(db, interview, 'llm_generated_questions', 'description')
-        else:
-            await QuestionService.commit_changes(db, interview, 'llm_generated_questions')
+        async with QuestionService.transaction(db, interview, 'llm_generated_questions'):
+            interview.llm_generated_questions = {"questions": questions}
+            if generated_description and not interview.description:
+                interview.description = generated_description
         
         return questions, generated_description
     
@@ -59,34 +69,57 @@ class QuestionService:
         manual_list = interview.manual_questions if isinstance(interview.manual_questions, list) else []
         questions = [normalize_question(q) for q in manual_list][:target_count]
         
-        interview.llm_generated_questions = {"questions": questions}
-        await QuestionService.commit_changes(db, interview, 'llm_generated_questions')
+        async with QuestionService.transaction(db, interview, 'llm_generated_questions'):
+            interview.llm_generated_questions = {"questions": questions}
         
         return questions
     
     @staticmethod
-    async def handle_dynamic_mode_description(
+    async def bootstrap_dynamic_interview(
         interview, 
         db, 
         context_for_llm: str
     ) -> Optional[str]:
-        if interview.description:
+        """Generate a missing description and first question concurrently, then commit once"""
+        needs_description = not interview.description
+        needs_first_question = not get_questions_list(interview)
+        if not needs_description and not needs_first_question:
             return None
         
         difficulty_level = QuestionService.get_difficulty_level(interview)
         interview_objective = interview.objective or ""
         interview_name = interview.name or ""
         
-        result = await llm_service._generate_predefined_questions(
-            context_for_llm, 1, difficulty_level, interview_objective, interview_name
-        )
-        
-        generated_description = result.get('description', '')
-        if generated_description:
-            interview.description = generated_description
-            await QuestionService.commit_changes(db, interview, 'description')
-        
-        return generated_description
+        # Only the generations that are actually needed run, side by side
+        pending = {}
+        if needs_description:
+            pending["description"] = llm_service._generate_predefined_questions(
+                context_for_llm, 1, difficulty_level, interview_objective, interview_name
+            )
+        if needs_first_question:
+            pending["first_question"] = llm_service._generate_dynamic_question(
+                context_for_llm, difficulty_level
+            )
+        results = dict(zip(pending, await asyncio.gather(*pending.values(), return_exceptions=True)))
+        
+        description_result = results.get("description", {})
+        generated = results.get("first_question")
+        if isinstance(description_result, Exception):
+            raise description_result
+        if isinstance(generated, Exception):
+            # The first question is generated on demand later if this fails
+            logger.warning("First dynamic question generation failed: %s", generated)
+            generated = None
+        
+        generated_description = description_result.get('description', '')
+        async with QuestionService.transaction(db, interview):
+            if generated_description:
+                interview.description = generated_description
+            if generated:
+                first_q = generated[0] if isinstance(generated, list) else generated
+                QuestionService._append_dynamic_question(interview, first_q)
+        
+        return generated_description or None
     
     @staticmethod
     def ensure_llm_questions_structure(interview):
@@ -97,20 +130,20 @@ class QuestionService:
         elif "questions" not in interview.llm_generated_questions:
             interview.llm_generated_questions["questions"] = []
     
+    @staticmethod
+    def _append_dynamic_question(interview, question: Dict) -> None:
+        QuestionService.ensure_llm_questions_structure(interview)
+        interview.llm_generated_questions["questions"].append(normalize_question(question))
+        flag_modified(interview, 'llm_generated_questions')
+    
     @staticmethod
     async def add_dynamic_question_to_interview(
         interview, 
         db, 
         question: Dict
     ) -> None:
-        QuestionService.ensure_llm_questions_structure(interview)
-        
-        normalized_q = normalize_question(question)
-        existing_questions = interview.llm_generated_questions.get("questions", [])
-        existing_questions.append(normalized_q)
-        interview.llm_generated_questions["questions"] = existing_questions
-        
-        await QuestionService.commit_changes(db, interview, 'llm_generated_questions')
+        async with QuestionService.transaction(db, interview):
+            QuestionService._append_dynamic_question(interview, question)
     
     @staticmethod
     async def generate_first_dynamic_question(
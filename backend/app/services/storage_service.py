@@ -1,21 +1,48 @@
+import aiofiles
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from config_loader import load_config
 from pathlib import Path
 from uuid import uuid4
-from typing import Optional
+from typing import BinaryIO, Optional
+import asyncio
 import shutil
-import subprocess
 import os
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# One shared client keeps a keep-alive pool wide enough for concurrent chunk uploads
+S3_CLIENT_CONFIG = Config(
+    max_pool_connections=64,
+    tcp_keepalive=True,
+    connect_timeout=2,
+    read_timeout=30,
+    retries={"mode": "adaptive", "max_attempts": 5},
+)
+
+# Large merged videos go up as concurrent 8 MiB multipart parts streamed from disk
+VIDEO_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=10,
+)
+
+# Codecs that can be stream-copied while keeping the stored MP4 as H.264/AAC
+MP4_COPY_CODECS = frozenset({"h264", "aac"})
 
 class StorageService :
     def __init__(self) :
         self.config = load_config()  
         self.storage_type = self.config.get('storage', {}).get('storage_type', 'local')
+        # Open append handles for local chunk streams, keyed by response_id
+        self._chunk_streams = {}
 
         if self.storage_type == 's3':
             # Ensure consistent attribute names used below
-            self.s3_client = boto3.client('s3')
+            self.s3_client = boto3.client('s3', config=S3_CLIENT_CONFIG)
             self.bucket_name = self.config.get('storage', {}).get('bucket_name')
         else:
             # Resolve storage path with safe defaults
@@ -37,24 +64,31 @@ class StorageService :
             self.video_dir.mkdir(parents=True, exist_ok=True)
             self.temp_dir.mkdir(parents=True, exist_ok=True)
     
-    async def save_candidate_image(self, file_content:bytes, response_id:str, file_extension:str) -> str :
+    async def save_candidate_image(self, file_obj:BinaryIO, response_id:str, file_extension:str) -> str :
+        # Streams from the file object in a worker thread instead of buffering the whole image
         if self.storage_type == "s3" :
             key = f"images/{response_id}.{file_extension}"
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=key,
-                Body=file_content,
-                ContentType=f"image/{file_extension}"
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
+                file_obj,
+                self.bucket_name,
+                key,
+                ExtraArgs={"ContentType": f"image/{file_extension}"}
             )
             return key
         else :
             filename = f"{response_id}.{file_extension}"
             file_path = self.image_dir / filename
-            with open(file_path, "wb") as f:
-                f.write(file_content)
+            await asyncio.to_thread(self._copy_to_file, file_obj, file_path)
             return f"images/{filename}"
 
+    @staticmethod
+    def _copy_to_file(file_obj:BinaryIO, file_path:Path) -> None :
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(file_obj, f, 64 * 1024)
+
     async def save_candidate_video(self, response_id: str) -> str:
+        await self.close_chunk_stream(response_id)
         temp_response_dir = self.temp_dir / response_id
         if not temp_response_dir.exists():
             raise FileNotFoundError(f"No chunks found for response_id: {response_id}")
@@ -69,7 +103,91 @@ class StorageService :
         # Output filename is MP4
         filename = self.video_dir / f"{response_id}.mp4"
 
-        print(f"[DEBUG] Re-encoding and concatenating {len(chunk_files)} chunks into MP4")
+        # Chunks from one recorder share codec parameters, so H.264/AAC recordings are
+        # remuxed without decoding; anything else (e.g. VP8/VP9 + Opus WebM) and
+        # streams that don't line up are re-encoded
+        merged = False
+        if (
+            len({chunk_file.suffix for chunk_file in chunk_files}) == 1
+            and self._is_mp4_copyable(await self._probe_codecs(chunk_files[0]))
+        ):
+            list_file = temp_response_dir / "concat.txt"
+            await asyncio.to_thread(
+                list_file.write_text,
+                "".join(f"file '{chunk_file.absolute()}'\n" for chunk_file in chunk_files)
+            )
+            logger.debug("Stream-copy concatenating %d chunks into MP4", len(chunk_files))
+            try:
+                await self._run_ffmpeg(self._concat_copy_cmd(list_file, filename))
+                merged = True
+            except RuntimeError as e:
+                logger.warning("Stream-copy concat failed for response_id: %s, re-encoding: %s", response_id, e)
+
+        if not merged:
+            logger.debug("Re-encoding and concatenating %d chunks into MP4", len(chunk_files))
+            try:
+                await self._run_ffmpeg(self._reencode_cmd(chunk_files, filename))
+            except RuntimeError:
+                logger.exception("Re-encoding video chunks failed for response_id: %s", response_id)
+                raise
+
+        await asyncio.to_thread(shutil.rmtree, temp_response_dir, ignore_errors=True)
+        
+        if self.storage_type == "s3" :
+            key = f"videos/{response_id}.mp4"
+            await asyncio.to_thread(
+                self.s3_client.upload_file,
+                str(filename),
+                self.bucket_name,
+                key,
+                ExtraArgs={"ContentType": "video/mp4"},
+                Config=VIDEO_TRANSFER_CONFIG
+            )
+            # Clean up local file after S3 upload
+            filename.unlink(missing_ok=True)
+            return key
+        else :       
+            return str(filename)
+    
+    @staticmethod
+    def _is_mp4_copyable(codecs: set[str]) -> bool:
+        return "h264" in codecs and codecs <= MP4_COPY_CODECS
+
+    @staticmethod
+    async def _probe_codecs(media_file: Path) -> set[str]:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "ffprobe",
+                "-v", "error",
+                "-show_entries", "stream=codec_name",
+                "-of", "csv=p=0",
+                str(media_file),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError as e:
+            logger.warning("ffprobe unavailable, re-encoding %s: %s", media_file, e)
+            return set()
+        stdout, _ = await proc.communicate()
+        if proc.returncode != 0:
+            return set()
+        return {line.strip() for line in stdout.decode('utf-8', errors='ignore').splitlines() if line.strip()}
+
+    @staticmethod
+    def _concat_copy_cmd(list_file: Path, output: Path) -> list[str]:
+        return [
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", str(list_file),
+            "-c", "copy",
+            "-movflags", "+faststart",
+            "-y",
+            str(output)
+        ]
+
+    @staticmethod
+    def _reencode_cmd(chunk_files: list[Path], output: Path) -> list[str]:
         # Build FFmpeg command with multiple inputs and a concat filter (re-encode to MP4)
         cmd: list[str] = ["ffmpeg"]
         for chunk_file in chunk_files:
@@ -93,38 +211,29 @@ class StorageService :
             "-b:a", "128k",
             "-movflags", "+faststart",
             "-y",
-            str(filename)
+            str(output)
         ])
-        
-        try:
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-            print(f"[DEBUG] FFmpeg merge completed successfully")
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr if isinstance(e.stderr, str) else e.stderr.decode('utf-8', errors='ignore')
-            print(f"[ERROR] FFmpeg merge failed: {error_msg}")
+        return cmd
+
+    @staticmethod
+    async def _run_ffmpeg(cmd: list[str]) -> None:
+        # Runs as a child process so the event loop keeps serving sockets meanwhile
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            error_msg = stderr.decode('utf-8', errors='ignore')
             raise RuntimeError(f"FFmpeg merge failed: {error_msg}")
+        logger.debug("FFmpeg merge completed successfully")
 
-        shutil.rmtree(temp_response_dir, ignore_errors=True)
-        
-        if self.storage_type == "s3" :
-            key = f"videos/{response_id}.mp4"
-            with open(filename, "rb") as f:
-                self.s3_client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=key,
-                    Body=f.read(),
-                    ContentType=f"video/mp4"
-                )
-            # Clean up local file after S3 upload
-            filename.unlink(missing_ok=True)
-            return key
-        else :       
-            return str(filename)
-    
     async def save_chunk(self, file_content:bytes, response_id:str, file_extension:str) -> str :
         if self.storage_type == "s3" :
             key = f"chunks/{response_id}/{uuid4()}.{file_extension}"
-            self.s3_client.put_object(
+            await asyncio.to_thread(
+                self.s3_client.put_object,
                 Bucket=self.bucket_name,
                 Key=key,
                 Body=file_content,
@@ -132,11 +241,23 @@ class StorageService :
             )
             return key
         else :
-            chunk_dir = self.temp_dir / response_id
-            chunk_dir.mkdir(parents=True, exist_ok=True)
-            file_path = chunk_dir / f"{uuid4()}.{file_extension}"
-            with open(file_path, "wb") as f:
-                f.write(file_content)
-            return str(file_path)
+            # MediaRecorder timeslices are consecutive pieces of one recording, so
+            # they are appended to a single per-response file opened once
+            stream = self._chunk_streams.get(response_id)
+            if stream is None:
+                chunk_dir = self.temp_dir / response_id
+                chunk_dir.mkdir(parents=True, exist_ok=True)
+                opened = await aiofiles.open(chunk_dir / f"stream.{file_extension}", "ab")
+                stream = self._chunk_streams.setdefault(response_id, opened)
+                if stream is not opened:
+                    await opened.close()
+            await stream.write(file_content)
+            await stream.flush()
+            return str(stream.name)
+
+    async def close_chunk_stream(self, response_id: str) -> None:
+        stream = self._chunk_streams.pop(response_id, None)
+        if stream is not None:
+            await stream.close()
 
 storage_service = StorageService()
\ No newline at end of file
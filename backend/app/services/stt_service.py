@@ -1,18 +1,39 @@
 # Deepgram / Whisper / Azure integration
 import os
 import aiohttp
-import json
+import orjson
 import asyncio
-from typing import AsyncIterator, Optional, List
+from typing import AsyncIterator, Callable, Optional, List
 from utils.redis_utils import get_audio_chunks
 from utils import audio_utils
 
+TRANSCRIBE_TIMEOUT = aiohttp.ClientTimeout(total=180)
+DEEPGRAM_CLOSE_STREAM = orjson.dumps({"type": "CloseStream"}).decode()
+
+# One HTTP session per process so REST calls and the streaming socket share
+# pooled keep-alive connections and cached DNS
+_http_session: Optional[aiohttp.ClientSession] = None
+
+def get_http_session() -> aiohttp.ClientSession:
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+    return _http_session
+
+async def close_http_session():
+    global _http_session
+    if _http_session:
+        await _http_session.close()
+        _http_session = None
+
 
 class STTProvider:
     async def transcribe(self, audio_bytes: bytes, language: Optional[str] = None) -> str:
         raise NotImplementedError
 
-    async def stream_transcribe(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue):
+    async def stream_transcribe(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue, on_open: Optional[Callable] = None):
         raise NotImplementedError
 
 
@@ -35,12 +56,12 @@ class AzureWhisperProvider(STTProvider):
             form.add_field("language", language)
         form.add_field("file", audio_bytes, filename="audio.wav", content_type="application/octet-stream")
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=180)) as session:
-            async with session.post(url, headers=headers, data=form) as response:
-                data = await response.json()
-                if response.status != 200:
-                    raise RuntimeError(f"Azure Whisper Error: {response.status} - {data}")
-                return data.get("text", "")
+        session = get_http_session()
+        async with session.post(url, headers=headers, data=form, timeout=TRANSCRIBE_TIMEOUT) as response:
+            body = await response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Azure Whisper Error: {response.status} - {body[:512]!r}")
+            return orjson.loads(body).get("text", "")
 
 
 class DeepgramProvider(STTProvider):
@@ -61,17 +82,23 @@ class DeepgramProvider(STTProvider):
         if language:
             params["language"] = language
 
-        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=180)) as session:
-            async with session.post(self.api_url, headers=headers, params=params, data=audio_bytes) as response:
-                data = await response.json()
-                if response.status != 200:
-                    raise RuntimeError(f"Deepgram Error: {response.status} - {data}")
+        session = get_http_session()
+        async with session.post(self.api_url, headers=headers, params=params, data=audio_bytes, timeout=TRANSCRIBE_TIMEOUT) as response:
+            body = await response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Deepgram Error: {response.status} - {body[:512]!r}")
 
-                results = data.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])
-                return results[0].get("transcript", "")
+            try:
+                return orjson.loads(body)["results"]["channels"][0]["alternatives"][0].get("transcript", "")
+            except (KeyError, IndexError):
+                return ""
     
-    async def stream_transcribe(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue):
-        """Connects to Deepgram's streaming API and transcribes audio in real-time."""
+    async def stream_transcribe(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue, on_open: Optional[Callable] = None):
+        """Connects to Deepgram's streaming API and transcribes audio in real-time.
+
+        on_open receives the connected WebSocket so callers know the stream is
+        live; all audio, and the closing None, still goes through audio_queue.
+        """
         #url = "wss://api.deepgram.com/v1/listen?punctuate=true&interim_results=true&model=nova-2&encoding=linear16&sample_rate=16000"
         url = (
         "wss://api.deepgram.com/v1/listen"
@@ -81,51 +108,53 @@ class DeepgramProvider(STTProvider):
             "Authorization": f"Token {self.api_key}",
         }
 
-        async with aiohttp.ClientSession() as session:
-            async with session.ws_connect(url, headers=headers) as ws:
-
-                async def sender(ws, audio_queue):
-                    """Sends audio chunks from the queue to Deepgram."""
-                    while True:
-                        chunk = await audio_queue.get()
-                        if chunk is None:
-                            try:
-                                await ws.send_json({'type': 'CloseStream'})
-                            except Exception:
-                                pass
-                            break
-                        if not chunk:
-                            continue
+        session = get_http_session()
+        async with session.ws_connect(url, headers=headers) as ws:
+            if on_open:
+                on_open(ws)
+
+            async def sender(ws, audio_queue):
+                """Sends audio chunks from the queue to Deepgram."""
+                while True:
+                    chunk = await audio_queue.get()
+                    if chunk is None:
                         try:
-                            await ws.send_bytes(chunk)
-                        except ConnectionResetError:
-                            break
+                            await ws.send_str(DEEPGRAM_CLOSE_STREAM)
                         except Exception:
-                            break
-
-                async def receiver(ws, transcript_queue):
-                    """Receives transcript results from Deepgram and puts them in the queue."""
-                    async for msg in ws:
-                        if msg.type == aiohttp.WSMsgType.TEXT:
-                            data = json.loads(msg.data)
-                            if data.get('type') == 'Results':
-                                transcript = data.get('channel', {}).get('alternatives', [{}])[0].get('transcript', '')
-                                if transcript:
-                                    await transcript_queue.put({
-                                        "text": transcript,
-                                        "is_final": data.get('is_final', False)
-                                    })
-                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
-                            break
-
-                sender_task = asyncio.create_task(sender(ws, audio_queue))
-                receiver_task = asyncio.create_task(receiver(ws, transcript_queue))
-                try:
-                    await asyncio.gather(sender_task, receiver_task)
-                finally:
-                    for t in (sender_task, receiver_task):
-                        if not t.done():
-                            t.cancel()
+                            pass
+                        break
+                    if not chunk:
+                        continue
+                    try:
+                        await ws.send_bytes(chunk)
+                    except ConnectionResetError:
+                        break
+                    except Exception:
+                        break
+
+            async def receiver(ws, transcript_queue):
+                """Receives transcript results from Deepgram and puts them in the queue."""
+                async for msg in ws:
+                    if msg.type == aiohttp.WSMsgType.TEXT:
+                        data = orjson.loads(msg.data)
+                        if data.get('type') == 'Results':
+                            transcript = data.get('channel', {}).get('alternatives', [{}])[0].get('transcript', '')
+                            if transcript:
+                                await transcript_queue.put({
+                                    "text": transcript,
+                                    "is_final": data.get('is_final', False)
+                                })
+                    elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                        break
+
+            sender_task = asyncio.create_task(sender(ws, audio_queue))
+            receiver_task = asyncio.create_task(receiver(ws, transcript_queue))
+            try:
+                await asyncio.gather(sender_task, receiver_task)
+            finally:
+                for t in (sender_task, receiver_task):
+                    if not t.done():
+                        t.cancel()
 
 
 class STTService:
@@ -141,10 +170,10 @@ class STTService:
         audio_data = audio_utils.converted_audio_compatible(audio_data)
         return await self.provider.transcribe(audio_data, language)
 
-    async def stream_transcribe_session(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue):
+    async def stream_transcribe_session(self, audio_queue: asyncio.Queue, transcript_queue: asyncio.Queue, on_open: Optional[Callable] = None):
         """Initiates a streaming transcription session."""
         if hasattr(self.provider, 'stream_transcribe'):
-            await self.provider.stream_transcribe(audio_queue, transcript_queue)
+            await self.provider.stream_transcribe(audio_queue, transcript_queue, on_open)
 
 
 
@@ -1,25 +1,93 @@
 import socketio
-from utils.redis_utils import create_session, add_audio_chunk, get_audio_chunks, remove_session
+from utils.redis_utils import REDIS_URL, create_session, add_audio_chunks, get_audio_chunks, remove_session, incr_video_chunks
 from services.stt_service import stt_service 
-from sqlalchemy import select
 from db import AsyncSessionLocal
-from models import Response
+from models import Interview
 from services.storage_service import storage_service
+from utils.logger import get_logger
 import asyncio
 import base64
 
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+logger = get_logger(__name__)
+
+# Redis-backed manager so emits reach clients connected to other uvicorn workers
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=socketio.AsyncRedisManager(REDIS_URL),
+)
 _sessions = {}
 
+# Audio chunks are persisted to Redis in batches, off the per-chunk path
+AUDIO_FLUSH_INTERVAL = 0.5
+AUDIO_FLUSH_BATCH = 32
+
+async def _flush_pending_audio(sess):
+    batch, sess["pending_audio"] = sess["pending_audio"], []
+    if not batch:
+        return
+    try:
+        await add_audio_chunks(sess["session_id"], batch)
+    except Exception as e:
+        logger.warning("Failed to persist %d audio chunks for session %s: %s", len(batch), sess["session_id"], e)
+
+async def _audio_flusher(sess):
+    flush_now = sess["audio_flush_event"]
+    while not sess["audio_closed"]:
+        try:
+            await asyncio.wait_for(flush_now.wait(), AUDIO_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        flush_now.clear()
+        await _flush_pending_audio(sess)
+    await _flush_pending_audio(sess)
+
+# Audio waiting for the STT socket is coalesced into ~8 KB frames on a bounded queue
+AUDIO_QUEUE_MAX_FRAMES = 64
+AUDIO_COALESCE_BYTES = 8192
+
+def _close_audio_stream(sess):
+    audio_queue = sess.get("audio_queue")
+    if not audio_queue:
+        return
+    if sess.get("audio_dropped_bytes"):
+        logger.warning("Dropped %d bytes of live audio for session %s", sess["audio_dropped_bytes"], sess["session_id"])
+    try:
+        if sess["audio_accum"]:
+            audio_queue.put_nowait(bytes(sess["audio_accum"]))
+            sess["audio_accum"].clear()
+        audio_queue.put_nowait(None)
+    except asyncio.QueueFull:
+        # The sender is stalled; the task is cancelled right after this
+        pass
+
+async def _finish_audio_flush(sess):
+    # Let the flusher write what is still pending before it exits
+    flush_task = sess.get("audio_flush_task")
+    if flush_task:
+        sess["audio_closed"] = True
+        sess["audio_flush_event"].set()
+        await flush_task
+
+async def _stop_task(task):
+    if not task:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        pass
+
 async def _cleanup_session(sid):
     sess = _sessions.pop(sid, None)
     if not sess:
         return
 
-    if "audio_queue" in sess and sess["audio_queue"]:
-        await sess["audio_queue"].put(None)
+    _close_audio_stream(sess)
 
-    for task_name in ["stt_task", "emitter_task"]:
+    for task_name in ["stt_task", "emitter_task", "audio_flush_task"]:
         if task_name in sess and sess[task_name]:
             try:
                 sess[task_name].cancel()
@@ -27,6 +95,9 @@ async def _cleanup_session(sid):
             except asyncio.CancelledError:
                 pass  
 
+    if sess.get("response_id"):
+        await storage_service.close_chunk_stream(sess["response_id"])
+
     if "session_id" in sess:
         await remove_session(sess["session_id"])
         await sio.leave_room(sid, sess["session_id"])
@@ -52,9 +123,7 @@ async def start_interview(sid, data):
     
 
     async with AsyncSessionLocal() as session:
-        from models import Interview
-        result = await session.execute(select(Interview).where(Interview.id == interview_id))
-        interview = result.scalar_one_or_none()
+        interview = await session.get(Interview, interview_id)
         
         if not interview:
             return {"ok": False, "error": f"Interview with id {interview_id} not found"}
@@ -67,33 +136,42 @@ async def start_interview(sid, data):
     await create_session(session_id)
     
 
-    audio_queue = asyncio.Queue()
+    audio_queue = asyncio.Queue(maxsize=AUDIO_QUEUE_MAX_FRAMES)
     transcript_queue = asyncio.Queue()
 
     async def transcript_emitter(sid, t_queue):
-        last_partial = ""
+        # Cancellation propagates to the caller, which awaits and swallows it
+        emit = sio.emit
         while True:
-            try:
-                update = await t_queue.get()
-                if update is None: break
-                text = update["text"] if isinstance(update, dict) else str(update)
-                is_final = update.get("is_final") if isinstance(update, dict) else True
-                await sio.emit("partial_transcript", {"text": text, "is_final": is_final}, to=sid)
-                if is_final:  
-                    last_partial = ""
-            except asyncio.CancelledError:
-                break
+            update = await t_queue.get()
+            if update is None: break
+            if isinstance(update, dict):
+                await emit("partial_transcript", update, to=sid)
+            else:
+                await emit("partial_transcript", {"text": str(update), "is_final": True}, to=sid)
         
     emitter_task = asyncio.create_task(transcript_emitter(sid, transcript_queue))
-    stt_task = asyncio.create_task(stt_service.stream_transcribe_session(audio_queue, transcript_queue))
-    
-    _sessions[sid] = {
+    sess = {
         "session_id": session_id, 
         "response_id": response_id,
         "audio_queue": audio_queue,
-        "stt_task": stt_task,
+        "audio_accum": bytearray(),
+        "audio_dropped_bytes": 0,
         "emitter_task": emitter_task,
+        "pending_audio": [],
+        "audio_flush_event": asyncio.Event(),
+        "audio_closed": False,
+        "dg_ws": None,
     }
+
+    def on_stt_open(ws):
+        sess["dg_ws"] = ws
+
+    sess["stt_task"] = asyncio.create_task(
+        stt_service.stream_transcribe_session(audio_queue, transcript_queue, on_stt_open)
+    )
+    sess["audio_flush_task"] = asyncio.create_task(_audio_flusher(sess))
+    _sessions[sid] = sess
     await sio.enter_room(sid, session_id)
 
     
@@ -109,8 +187,35 @@ async def send_audio_chunk(sid, data):
     chunk_bytes = data if isinstance(data, (bytes, bytearray)) else data.get("chunk_data", data)
     
     if chunk_bytes:
-        await sess["audio_queue"].put(chunk_bytes)
-        await add_audio_chunk(sess["session_id"], chunk_bytes)
+        # The STT sender task is the only writer to the socket, so every frame goes
+        # through the queue to keep audio in order. Once the stream is open and keeping
+        # up, chunks are queued as they arrive; otherwise they are coalesced first
+        ws = sess["dg_ws"]
+        audio_queue = sess["audio_queue"]
+        accum = sess["audio_accum"]
+        if ws is not None and not ws.closed and audio_queue.empty():
+            if accum:
+                accum.extend(chunk_bytes)
+                audio_queue.put_nowait(bytes(accum))
+                accum.clear()
+            else:
+                audio_queue.put_nowait(chunk_bytes)
+        else:
+            accum.extend(chunk_bytes)
+            if len(accum) >= AUDIO_COALESCE_BYTES and not audio_queue.full():
+                audio_queue.put_nowait(bytes(accum))
+                accum.clear()
+            elif len(accum) > AUDIO_COALESCE_BYTES * AUDIO_QUEUE_MAX_FRAMES:
+                # The STT stream has stopped draining; the Redis copy still feeds the final transcript.
+                # Warn once, then count what is dropped and report the total when the stream closes
+                if not sess["audio_dropped_bytes"]:
+                    logger.warning("STT stream backlog full for session %s, dropping live audio", sess["session_id"])
+                sess["audio_dropped_bytes"] += len(accum)
+                accum.clear()
+        # Only the incoming chunk is persisted; coalesced frames repeat audio already queued for Redis
+        sess["pending_audio"].append(chunk_bytes)
+        if len(sess["pending_audio"]) >= AUDIO_FLUSH_BATCH:
+            sess["audio_flush_event"].set()
         return {"ok": True}
     
     return {"ok": False, "error": "Empty audio chunk"}
@@ -127,14 +232,22 @@ async def save_video_chunk(sid, data):
         await sio.emit("error", {"error": "Invalid data received"}, to=sid)
         return
     
+    if isinstance(chunk, (bytes, bytearray)):
+        chunk_bytes = chunk
+    else:
+        # Legacy clients send a base64 string, optionally as a data URL
+        try:
+            if chunk.startswith("data:"):
+                chunk = chunk[chunk.index(",") + 1:]
+            chunk_bytes = base64.b64decode(chunk)
+        except Exception as e:
+            await sio.emit("error", {"error": f"Base64 decode failed: {str(e)}"}, to=sid)
+            return
+    await storage_service.save_chunk(chunk_bytes, response_id, file_extension)
     try:
-        if chunk.startswith("data:"):
-            chunk = chunk.split(",")[1]
-        chunk_bytes = base64.b64decode(chunk)
+        await incr_video_chunks(response_id)
     except Exception as e:
-        await sio.emit("error", {"error": f"Base64 decode failed: {str(e)}"}, to=sid)
-        return
-    await storage_service.save_chunk(chunk_bytes, response_id, file_extension)
+        logger.warning("Failed to count video chunk for response_id: %s: %s", response_id, e)
     await sio.emit("video_chunk_saved", {"ok": True}, to=sid)
 
 
@@ -144,48 +257,29 @@ async def end_interview(sid, data=None):
     if not sess:
         return {"ok": False, "error": "No active session"}
     session_id = sess["session_id"]
-    response_id = sess["response_id"]
 
-    if "audio_queue" in sess:
-        try:
-            await sess["audio_queue"].put(None)
-        except Exception:
-            pass
+    _close_audio_stream(sess)
 
-    for task_name in ["stt_task", "emitter_task"]:
-        task = sess.get(task_name)
-        if task:
-            try:
-                task.cancel()
-                await task
-            except asyncio.CancelledError:
-                pass
-            except Exception:
-                pass
+    # Flushing pending audio and stopping the live STT tasks don't depend on each other
+    await asyncio.gather(
+        _finish_audio_flush(sess),
+        _stop_task(sess.get("stt_task")),
+        _stop_task(sess.get("emitter_task")),
+    )
+
+    # The video merge may run in another worker, which can't close this worker's handle
+    if sess.get("response_id"):
+        await storage_service.close_chunk_stream(sess["response_id"])
 
     try:
+        # The final transcript reads back the audio flushed above
         final_text = await stt_service.transcribe_session(session_id)
         await sio.emit("transcript_result", {"text": final_text}, to=sid)
-
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(select(Response).where(Response.id == response_id))
-            resp = result.scalar_one_or_none()
-            if resp:
-                if hasattr(resp, 'transcripts') and isinstance(resp.transcripts, list):
-                    resp.transcripts.append(final_text)
-                else:
-                    pass
-                resp.is_ended = True
-                await session.commit()
-
         return {"ok": True, "final": True, "transcript": final_text}
     finally:
-        try:
-            await remove_session(session_id)
-        except Exception:
-            pass
-        try:
-            await sio.leave_room(sid, session_id)
-        except Exception:
-            pass
-        _sessions.pop(sid, None)
\ No newline at end of file
+        _sessions.pop(sid, None)
+        await asyncio.gather(
+            remove_session(session_id),
+            sio.leave_room(sid, session_id),
+            return_exceptions=True,
+        )
\ No newline at end of file
@@ -1 +1,23 @@
-# For saving/loading media or transcripts
\ No newline at end of file
+# For saving/loading media or transcripts
+
+from typing import Optional
+
+# Leading bytes of the image formats accepted for candidate photos
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+
+IMAGE_SNIFF_BYTES = 12
+
+
+def sniff_image_extension(header: bytes) -> Optional[str]:
+    """Return the file extension for an image header, or None if unrecognised"""
+    for signature, extension in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
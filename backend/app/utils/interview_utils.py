@@ -1,16 +1,33 @@
 import base64
-import io
 import json
 import uuid
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
+import orjson
 import PyPDF2
 import docx
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, exists, and_, or_, func, TIMESTAMP
+from sqlalchemy.dialects.postgresql import UUID
+from db import AsyncSessionLocal
 from models import Interview, Response
 from services.tts_service import tts_service
+from services.storage_service import storage_service
+from utils.redis_utils import get_cached, set_cached, delete_cached
+
+INTERVIEW_CACHE_TTL = 300
+
+# Completed responses with answers or an analysis; served by ix_response_interview_completed.
+REPORTABLE_RESPONSE_FILTER = and_(
+    Response.is_completed == True,
+    or_(
+        func.jsonb_array_length(Response.qa_history) > 0,
+        Response.overall_analysis.isnot(None),
+    ),
+)
 
 def _remove_text_field(questions: list) -> list:
     if not questions:
@@ -41,8 +58,27 @@ def get_questions_list(interview) -> list:
     
     return []
 
+_NO_DIFFICULTY = object()
+
+@lru_cache(maxsize=2048)
+def _normalize_identified_question(q_id, question, difficulty) -> dict:
+    normalized = {"id": q_id, "question": question}
+    if difficulty is not _NO_DIFFICULTY:
+        normalized['difficulty'] = difficulty
+    return normalized
+
 def normalize_question(q):
     if isinstance(q, dict):
+        # Only questions that already carry an id are deterministic enough to cache;
+        # callers get a copy so they can't mutate the cached entry
+        if q.get('id'):
+            try:
+                return dict(_normalize_identified_question(
+                    q['id'], q.get('question'), q.get('difficulty', _NO_DIFFICULTY)
+                ))
+            except TypeError:
+                # Unhashable field values
+                pass
         normalized = {
             "id": q.get('id') or str(uuid.uuid4()),
             "question": q.get('question')
@@ -81,6 +117,57 @@ async def get_interview_or_404(db: AsyncSession, interview_id: str) -> Interview
         raise HTTPException(status_code=404, detail="Interview not found")
     return interview
 
+def _interview_cache_name(interview_id) -> str:
+    return f"interview:{interview_id}"
+
+def _dump_interview(interview: Interview) -> bytes:
+    return orjson.dumps({c.key: getattr(interview, c.key) for c in Interview.__table__.columns})
+
+def _load_interview(raw: bytes) -> Interview:
+    data = orjson.loads(raw)
+    for column in Interview.__table__.columns:
+        value = data.get(column.key)
+        if value is None:
+            continue
+        if isinstance(column.type, UUID):
+            data[column.key] = uuid.UUID(value)
+        elif isinstance(column.type, TIMESTAMP):
+            data[column.key] = datetime.fromisoformat(value)
+    return Interview(**data)
+
+async def get_interview_cached(interview_id: str, db: Optional[AsyncSession] = None) -> Optional[Interview]:
+    """Read-only interview lookup backed by a Redis snapshot of its columns.
+
+    The returned object is detached from any session; callers that modify the
+    interview must load it with get_interview_or_404 instead.
+    """
+    name = _interview_cache_name(interview_id)
+    try:
+        cached = await get_cached(name)
+        if cached:
+            return _load_interview(cached)
+    except Exception as e:
+        print(f"[WARN] Interview cache read failed: {e}")
+
+    stmt = select(Interview).where(Interview.id == interview_id)
+    if db is not None:
+        interview = (await db.execute(stmt)).scalar_one_or_none()
+    else:
+        async with AsyncSessionLocal() as session:
+            interview = (await session.execute(stmt)).scalar_one_or_none()
+    if interview:
+        try:
+            await set_cached(name, _dump_interview(interview), INTERVIEW_CACHE_TTL)
+        except Exception as e:
+            print(f"[WARN] Interview cache write failed: {e}")
+    return interview
+
+async def invalidate_interview_cache(interview_id) -> None:
+    try:
+        await delete_cached(_interview_cache_name(interview_id))
+    except Exception as e:
+        print(f"[WARN] Failed to invalidate interview cache: {e}")
+
 async def get_response_or_404(db: AsyncSession, response_id: str) -> Response:
     result = await db.execute(select(Response).where(Response.id == response_id))
     resp = result.scalar_one_or_none()
@@ -88,27 +175,54 @@ async def get_response_or_404(db: AsyncSession, response_id: str) -> Response:
         raise HTTPException(status_code=404, detail="Response not found")
     return resp
 
-def extract_text_from_file(file_content: bytes, filename: str) -> str:
-    file_extension = Path(filename).suffix.lower()
-    
-    if file_extension == '.txt':
-        return file_content.decode('utf-8', errors='ignore')
+async def store_candidate_video_or_404(db: AsyncSession, response_id: str) -> str:
+    # Check the response exists before spending a merge on it
+    if not await db.scalar(select(exists().where(Response.id == response_id))):
+        raise HTTPException(status_code=404, detail="Response not found")
+
+    # Extension will be auto-detected from chunks
+    storage_url = await storage_service.save_candidate_video(response_id)
+    await db.execute(
+        update(Response)
+        .where(Response.id == response_id)
+        .values(candidate_video_url=storage_url)
+    )
+    await db.commit()
+    return storage_url
+
+async def get_response_with_interview(db: AsyncSession, response_id: str) -> tuple[Response, Interview]:
+    result = await db.execute(
+        select(Response, Interview)
+        .outerjoin(Interview, Response.interview_id == Interview.id)
+        .where(Response.id == response_id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Response not found")
+    resp, interview = row
+    if not interview:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    return resp, interview
+
+def extract_text_from_path(file_path: str) -> str:
+    file_extension = Path(file_path).suffix.lower()
     
-    elif file_extension == '.pdf':
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    if file_extension == '.pdf':
+        pdf_reader = PyPDF2.PdfReader(file_path)
         text = ""
         for page in pdf_reader.pages:
             text += page.extract_text() + "\n"
         return text
     
     elif file_extension in ['.docx', '.doc']:
-        doc = docx.Document(io.BytesIO(file_content))
+        doc = docx.Document(file_path)
         text = ""
         for paragraph in doc.paragraphs:
             text += paragraph.text + "\n"
         return text
     
-    return file_content.decode('utf-8', errors='ignore')
+    with open(file_path, 'rb') as f:
+        return f.read().decode('utf-8', errors='ignore')
 
 def format_duration(seconds: int) -> str:
     """Format duration in seconds to readable format (e.g., '1m 3s' or '1:03')"""
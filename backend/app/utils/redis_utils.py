@@ -29,6 +29,13 @@ async def add_audio_chunk(session_id: str, chunk_bytes: bytes):
     await redis.rpush(key, chunk_bytes)
     await redis.expire(key, 3600)
 
+async def add_audio_chunks(session_id: str, chunks: list):
+    key = _key(session_id)
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.rpush(key, *chunks)
+    pipe.expire(key, 3600)
+    await pipe.execute()
+
 async def get_audio_chunks(session_id: str):
     redis = get_redis()
     return await redis.lrange(_key(session_id), 0, -1) or []
@@ -65,6 +72,31 @@ async def get_session_meta(session_id: str) -> dict:
              (v.decode("utf-8") if isinstance(v, (bytes, bytearray)) else str(v))
              for k, v in raw.items() }
 
+def _cache_key(name: str) -> str:
+    return f"cache:{name}"
+
+async def get_cached(name: str):
+    return await get_redis().get(_cache_key(name))
+
+async def set_cached(name: str, value: bytes, ttl: int):
+    await get_redis().set(_cache_key(name), value, ex=ttl)
+
+async def delete_cached(*names: str):
+    await get_redis().delete(*[_cache_key(n) for n in names])
+
+def _video_chunks_key(response_id: str) -> str:
+    return f"video:{response_id}:chunks"
+
+async def incr_video_chunks(response_id: str) -> int:
+    pipe = get_redis().pipeline()
+    pipe.incr(_video_chunks_key(response_id))
+    pipe.expire(_video_chunks_key(response_id), 7200)
+    count, _ = await pipe.execute()
+    return count
+
+async def get_video_chunk_count(response_id: str) -> int:
+    return int(await get_redis().get(_video_chunks_key(response_id)) or 0)
+
 async def delete_session_all(session_id: str):
     redis = get_redis()
     await redis.delete(_meta_key(session_id))
@@ -1,29 +1,46 @@
+import asyncio
 import os
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 from passlib.context import CryptContext
 import jwt
 import os
-import smtplib
+import aiosmtplib
 from email.message import EmailMessage
+from utils.logger import get_logger
 
+logger = get_logger(__name__)
 
 _pwd_context = CryptContext(schemes=["bcrypt_sha256", "bcrypt"], deprecated="auto")
+# Default scheme's handler, called directly to skip CryptContext's per-call dispatch
+_default_hasher = _pwd_context.handler()
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me-in-prod")
 JWT_ALG = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRE_MINUTES = int(os.getenv("JWT_EXPIRE_MINUTES", "60"))
 
+EMAIL_QUEUE_MAX_SIZE = 1000
+_email_queue: Optional[asyncio.Queue] = None
+_email_worker: Optional[asyncio.Task] = None
 
-def hash_password(plain_password: str) -> str:
+
+def _verify_password_sync(plain_password: str, password_hash: str) -> bool:
+    if _default_hasher.identify(password_hash):
+        return _default_hasher.verify(plain_password, password_hash)
+    # Legacy plain-bcrypt hashes
+    return _pwd_context.verify(plain_password, password_hash)
+
+
+async def hash_password(plain_password: str) -> str:
     if not plain_password:
         raise ValueError("Password cannot be empty")
-    return _pwd_context.hash(plain_password)
+    # bcrypt is CPU-bound by design; keep it off the event loop
+    return await asyncio.to_thread(_default_hasher.hash, plain_password)
 
 
-def verify_password(plain_password: str, password_hash: str) -> bool:
+async def verify_password(plain_password: str, password_hash: str) -> bool:
     if not plain_password:
         return False
-    return _pwd_context.verify(plain_password, password_hash)
+    return await asyncio.to_thread(_verify_password_sync, plain_password, password_hash)
 
 
 def create_access_token(subject: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
@@ -37,7 +54,7 @@ def decode_access_token(token: str) -> Dict[str, Any]:
     return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
 
 
-def send_email(to_email: str, subject: str, body_text: str) -> None:
+async def send_email(to_email: str, subject: str, body_text: str) -> None:
     host = os.getenv("SMTP_HOST")
     port = int(os.getenv("SMTP_PORT", "587"))
     user = os.getenv("SMTP_USER")
@@ -54,10 +71,51 @@ def send_email(to_email: str, subject: str, body_text: str) -> None:
     msg["Subject"] = subject
     msg.set_content(body_text)
 
-    with smtplib.SMTP(host, port) as server:
-        server.starttls()
-        server.login(user, password)
-        server.send_message(msg)
+    await aiosmtplib.send(
+        msg,
+        hostname=host,
+        port=port,
+        username=user,
+        password=password,
+        start_tls=True,
+    )
+
+
+async def _drain_email_queue(queue: asyncio.Queue) -> None:
+    # A single worker sends queued mail one message at a time, so bursts never
+    # open more than one SMTP connection
+    while True:
+        to_email, subject, body_text = await queue.get()
+        try:
+            await send_email(to_email, subject, body_text)
+        except Exception:
+            logger.exception("Failed to send email to %s", to_email)
+        finally:
+            queue.task_done()
+
+
+def enqueue_email(to_email: str, subject: str, body_text: str) -> None:
+    global _email_queue, _email_worker
+    if _email_queue is None:
+        _email_queue = asyncio.Queue(maxsize=EMAIL_QUEUE_MAX_SIZE)
+    if _email_worker is None or _email_worker.done():
+        _email_worker = asyncio.create_task(_drain_email_queue(_email_queue))
+    try:
+        _email_queue.put_nowait((to_email, subject, body_text))
+    except asyncio.QueueFull:
+        logger.warning("Email queue full, dropping email to %s", to_email)
+
+
+async def close_email_queue() -> None:
+    global _email_queue, _email_worker
+    if _email_worker:
+        _email_worker.cancel()
+        try:
+            await _email_worker
+        except asyncio.CancelledError:
+            pass
+    _email_queue = None
+    _email_worker = None
 
 
 
@@ -3,6 +3,7 @@
 import os
 from dotenv import load_dotenv
 from app.models import Base, Organization, User, Interview, Response, Feedback
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
@@ -12,9 +13,29 @@ load_dotenv()
 
 engine = create_async_engine(os.getenv("DATABASE_URL"), echo=True)
 
+# create_all() skips tables that already exist, so columns added to the
+# models later are applied here. Every statement must be idempotent.
+SCHEMA_UPGRADES = [
+    "ALTER TABLE response ADD COLUMN IF NOT EXISTS candidate_video_url TEXT",
+    "ALTER TABLE interview ADD COLUMN IF NOT EXISTS candidate_link TEXT",
+    "UPDATE interview SET candidate_link = COALESCE("
+    "'/candidate/interview/' || NULLIF(readable_slug, ''), url, '/candidate/interview/' || id::text"
+    ") WHERE candidate_link IS NULL",
+    "CREATE INDEX IF NOT EXISTS ix_response_interview_completed ON response (interview_id) WHERE is_completed",
+    "ALTER TABLE response ADD COLUMN IF NOT EXISTS overall_score DOUBLE PRECISION GENERATED ALWAYS AS "
+    "(COALESCE((overall_analysis->>'overall_score')::double precision, 0)) STORED",
+    "ALTER TABLE response ADD COLUMN IF NOT EXISTS communication_score DOUBLE PRECISION GENERATED ALWAYS AS "
+    "(COALESCE((overall_analysis->>'communication_score')::double precision, 0)) STORED",
+    "ALTER TABLE response ADD COLUMN IF NOT EXISTS sentiment TEXT GENERATED ALWAYS AS "
+    "(COALESCE(lower(overall_analysis->>'sentiment'), 'neutral')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_response_overall_score ON response (interview_id, overall_score, id)",
+]
+
 async def create_tables():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        for statement in SCHEMA_UPGRADES:
+            await conn.execute(text(statement))
     print("Tables created successfully!")
 
 asyncio.run(create_tables())
@@ -12,6 +12,36 @@ export default function InterviewDetail({ apiBaseUrl, interviewId }: Props) {
   const [overallAnalysis, setOverallAnalysis] = useState<any>(null);
   const [loadingAnalysis, setLoadingAnalysis] = useState(false);
   const [selectedVideo, setSelectedVideo] = useState<{url: string, name: string} | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+
+  const fetchAnalysisPage = async (actualInterviewId: string, cursor: string | null) => {
+    const cursorParam = cursor ? `&cursor=${encodeURIComponent(cursor)}` : '';
+    const analysis = await fetch(`${apiBaseUrl}/api/interview/get-overall-analysis?interview_id=${encodeURIComponent(actualInterviewId)}${cursorParam}`, {
+      method: 'GET',
+      headers: getApiHeaders(false),
+    });
+    return analysis.json();
+  };
+
+  // Candidates are paginated; further pages are only fetched when asked for
+  const loadMoreCandidates = async () => {
+    if (!nextCursor || !interviewMeta?.id || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchAnalysisPage(interviewMeta.id, nextCursor);
+      if (page?.ok) {
+        setOverallAnalysis((prev: any) => prev
+          ? { ...prev, candidates: [...(prev.candidates || []), ...(page.candidates || [])] }
+          : page);
+        setNextCursor(page.next_cursor || null);
+      }
+    } catch (e) {
+      console.error('Failed to load more candidates', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     let cancelled = false;
@@ -47,13 +77,12 @@ export default function InterviewDetail({ apiBaseUrl, interviewId }: Props) {
           if (rsData.responses && rsData.responses.length > 0) {
             setLoadingAnalysis(true);
             try {
-              const analysis = await fetch(`${apiBaseUrl}/api/interview/get-overall-analysis?interview_id=${encodeURIComponent(actualInterviewId)}`, {
-                method: 'GET',
-                headers: getApiHeaders(false),
-              });
+              const page = await fetchAnalysisPage(actualInterviewId, null);
               if (cancelled) return;
-              const analysisData = await analysis.json();
-              if (analysisData?.ok) setOverallAnalysis(analysisData);
+              if (page?.ok) {
+                setOverallAnalysis(page);
+                setNextCursor(page.next_cursor || null);
+              }
             } catch (e) {
               console.error('Failed to load overall analysis', e);
             } finally {
@@ -331,6 +360,17 @@ export default function InterviewDetail({ apiBaseUrl, interviewId }: Props) {
                         </tbody>
                       </table>
                     </div>
+                    {nextCursor && (
+                      <div className="flex justify-center mb-6">
+                        <button
+                          onClick={loadMoreCandidates}
+                          disabled={loadingMore}
+                          className="px-4 py-2 text-sm border rounded hover:bg-gray-50 disabled:opacity-50"
+                        >
+                          {loadingMore ? 'Loading...' : 'Load more candidates'}
+                        </button>
+                      </div>
+                    )}
 
                     {/* Analytics Cards */}
                     <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
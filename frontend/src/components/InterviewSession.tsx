@@ -612,65 +612,8 @@ export default function InterviewSession({
           // Send chunk via Socket.IO
           const chunkIndex = screenChunkIndexRef.current;
           try {
-            // Log blob details before conversion
-            console.log(`[DEBUG] Converting blob to base64 - size: ${e.data.size} bytes, type: ${e.data.type}, chunk index: ${chunkIndex}`);
-            
-            // Convert blob to base64 using FileReader (more memory efficient for large chunks)
-            const base64Chunk = await new Promise<string>((resolve, reject) => {
-              const reader = new FileReader();
-              reader.onload = () => {
-                try {
-                  const result = reader.result as string;
-                  console.log(`[DEBUG] FileReader result length: ${result.length}, has comma: ${result.includes(',')}`);
-                  
-                  // Remove data URL prefix (e.g., "data:video/webm;base64,")
-                  let base64 = result;
-                  if (result.includes(',')) {
-                    base64 = result.split(',')[1];
-                    console.log(`[DEBUG] After removing prefix, base64 length: ${base64.length}`);
-                  } else {
-                    console.warn(`[WARN] No comma found in FileReader result, using entire result`);
-                  }
-                  
-                  // Clean any whitespace, newlines, carriage returns, and other invalid characters
-                  // Base64 only allows: A-Z, a-z, 0-9, +, /, and = (for padding)
-                  const beforeClean = base64.length;
-                  base64 = base64.trim().replace(/[\s\n\r\t]/g, '');
-                  
-                  // Remove any characters that aren't valid base64 (keep only A-Za-z0-9+/=)
-                  base64 = base64.replace(/[^A-Za-z0-9+/=]/g, '');
-                  console.log(`[DEBUG] After cleaning - before: ${beforeClean}, after: ${base64.length}`);
-                  
-                  // Validate base64 string
-                  if (base64.length === 0) {
-                    throw new Error('Empty base64 string after cleaning');
-                  }
-                  
-                  // Ensure proper padding (base64 strings must be multiples of 4)
-                  const padding = base64.length % 4;
-                  if (padding > 0) {
-                    base64 += '='.repeat(4 - padding);
-                  }
-                  
-                  // Calculate expected decoded size (base64 is ~4/3 the size of binary)
-                  const expectedDecodedSize = Math.floor(base64.length * 3 / 4);
-                  console.log(`[DEBUG] Base64 string length: ${base64.length}, expected decoded size: ~${expectedDecodedSize} bytes`);
-                  
-                  if (expectedDecodedSize < 100) {
-                    console.warn(`[WARN] Base64 chunk is very small (${expectedDecodedSize} bytes), blob size was ${e.data.size} bytes`);
-                  }
-                  
-                  resolve(base64);
-                } catch (err) {
-                  reject(err);
-                }
-              };
-              reader.onerror = (error) => {
-                console.error(`[ERROR] FileReader error:`, error);
-                reject(new Error('Failed to read blob as base64'));
-              };
-              reader.readAsDataURL(e.data);
-            });
+            // Send the raw bytes; Socket.IO carries ArrayBuffers as binary attachments
+            const chunkBuffer = await e.data.arrayBuffer();
             
             // Force MP4-only pipeline
             const fileExtension = 'mp4';
@@ -718,12 +661,12 @@ export default function InterviewSession({
                 socket.once('error', errorHandler);
                 
                 // Log before sending
-                console.log(`[DEBUG] Sending chunk ${chunkIndex} - base64 length: ${base64Chunk.length}, expected bytes: ~${Math.floor(base64Chunk.length * 3 / 4)}`);
+                console.log(`[DEBUG] Sending chunk ${chunkIndex} - ${chunkBuffer.byteLength} bytes`);
                 
                 // Emit the chunk
                 socket.emit('save_video_chunk', {
                   response_id: resId,
-                  chunk: base64Chunk,
+                  chunk: chunkBuffer,
                   file_extension: fileExtension
                 });
               });
@@ -912,6 +855,31 @@ export default function InterviewSession({
     }
   };
 
+  // The final analysis is generated in the background once the interview ends,
+  // so poll the response detail until it has been stored
+  const pollFinalAnalysis = async (id: string, attempts: number = 20, intervalMs: number = 3000) => {
+    for (let attempt = 0; attempt < attempts; attempt++) {
+      if (attempt > 0) {
+        await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      }
+      try {
+        const detailRes = await fetch(`${apiBaseUrl}/api/interview/get-response?response_id=${encodeURIComponent(id)}`, {
+          method: 'GET',
+          headers: getApiHeaders(false),
+        });
+        if (detailRes.ok) {
+          const detailData = await detailRes.json();
+          if (detailData.analysis_ready) {
+            setFinalAnalysis(detailData.general_summary);
+            return;
+          }
+        }
+      } catch (e) {
+        console.error('Failed to fetch final analysis', e);
+      }
+    }
+  };
+
   const submitAnswer = async () => {
     if (!responseId || !transcript.trim() || transcript === 'Recording...') {
       setError('Please record an answer first');
@@ -953,6 +921,8 @@ export default function InterviewSession({
         setInterviewComplete(true);
         if (data.final_analysis) {
         setFinalAnalysis(data.final_analysis);
+        } else if (data.analysis_status === 'analyzing' && responseId) {
+          pollFinalAnalysis(responseId);
         }
         // Update question counts when interview completes naturally
         if (data.question_number !== undefined) {
@@ -1015,7 +985,9 @@ export default function InterviewSession({
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          response_id: responseId
+          response_id: responseId,
+          // Lets the server merge the recording as soon as every chunk is saved
+          video_chunks: screenChunkIndexRef.current
         }),
       });
 
@@ -1034,20 +1006,9 @@ export default function InterviewSession({
         setTotalQuestions(endData.total_questions);
       }
       
-      // Fetch final analysis from response detail if needed
+      // Fetch final analysis from response detail, waiting for it while it is generated
       if (responseId) {
-        try {
-          const detailRes = await fetch(`${apiBaseUrl}/api/interview/get-response?response_id=${encodeURIComponent(responseId)}`, {
-            method: 'GET',
-            headers: getApiHeaders(false),
-          });
-          if (detailRes.ok) {
-            const detailData = await detailRes.json();
-            setFinalAnalysis(detailData.general_summary);
-          }
-        } catch (e) {
-          console.error('Failed to fetch final analysis', e);
-        }
+        pollFinalAnalysis(responseId, endData.analysis_status === 'analyzing' ? 20 : 1);
       }
     } catch (err) {
       setError(err instanceof Error ? err.message : 'An error occurred');